@@ -1,34 +1,100 @@
 import re
+import threading
+
+from django.core.cache import cache
 
 from .models import UserAgentBotRule, UserAgentFalsePositive
 
 
 MAX_USER_AGENT_LENGTH = 512
+MAX_PATTERN_LENGTH = 2000
+# Best-effort: a single-level group that contains a repeat and is repeated
+# again, e.g. ``(a+)+`` or ``(\w*\s?)*``. It misses deeper nesting such as
+# ``((a+))+`` and overlapping alternations such as ``(a|aa)+``, and rejects
+# some safe patterns such as ``(\d+\.)+``. It catches the common shape; it is
+# not a ReDoS guarantee.
+_NESTED_QUANTIFIER_RE = re.compile(r"\((?:[^()\\]|\\.)*[+*](?:[^()\\]|\\.)*\)(?:[+*]|\{\d*,)")
+FALSE_POSITIVES_CACHE_KEY = "analytics:bot_false_positives"
+# No CACHES setting, so each process has its own cache: the signal-driven
+# invalidation only clears the saving process, and other processes keep the
+# old set until this TTL runs out.
+FALSE_POSITIVES_CACHE_TIMEOUT = 60 * 5
+
+# The most recently used bot pattern, compiled, so a rule update recompiles
+# once instead of probing ``re``'s cache per request. Admin evaluations of the
+# saved rule hit the same entry.
+_COMPILED: tuple[str, re.Pattern] | None = None
+_COMPILED_LOCK = threading.Lock()
 
 
 def validate_bot_pattern(pattern: str) -> None:
+    """Reject overlong, invalid, or obviously nested-repeat patterns.
+
+    The nested-repeat check is a heuristic, not a ReDoS guarantee.
+    """
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise ValueError(f"pattern is longer than {MAX_PATTERN_LENGTH} characters")
     try:
         re.compile(pattern)
     except re.error as exc:
         raise ValueError(str(exc)) from exc
+    if _NESTED_QUANTIFIER_RE.search(pattern):
+        raise ValueError(
+            "nested repeats such as (a+)+ can backtrack catastrophically "
+            "(best-effort check; rewrite the group without the inner repeat)"
+        )
+
+
+def _search(pattern: str, user_agent: str):
+    # ``endpos`` matches as if the string ended there, without copying a slice.
+    return _get_compiled(pattern).search(user_agent, 0, MAX_USER_AGENT_LENGTH)
 
 
 def evaluate_user_agent_against_pattern(pattern: str, user_agent: str) -> bool:
     if not pattern or not user_agent:
         return False
-    return bool(re.search(pattern, user_agent[:MAX_USER_AGENT_LENGTH]))
+    return bool(_search(pattern, user_agent))
+
+
+def _get_compiled(pattern: str) -> re.Pattern:
+    global _COMPILED
+    cached = _COMPILED
+    if cached is not None and cached[0] == pattern:
+        return cached[1]
+    with _COMPILED_LOCK:
+        if _COMPILED is None or _COMPILED[0] != pattern:
+            _COMPILED = (pattern, re.compile(pattern))
+        return _COMPILED[1]
+
+
+def _get_false_positives() -> frozenset[str]:
+    false_positives = cache.get(FALSE_POSITIVES_CACHE_KEY)
+    if false_positives is None:
+        false_positives = frozenset(
+            UserAgentFalsePositive.objects.values_list("user_agent", flat=True)
+        )
+        cache.set(
+            FALSE_POSITIVES_CACHE_KEY,
+            false_positives,
+            timeout=FALSE_POSITIVES_CACHE_TIMEOUT,
+        )
+    return false_positives
+
+
+def invalidate_false_positives() -> None:
+    cache.delete(FALSE_POSITIVES_CACHE_KEY)
 
 
 def should_flag_user_agent(user_agent: str):
     if not user_agent:
         return False, None
-    rule = UserAgentBotRule.get_current()
+    rule = UserAgentBotRule.get_cached()
     if not rule.enabled or not rule.pattern:
         return False, None
-    if UserAgentFalsePositive.objects.filter(user_agent=user_agent).exists():
+    if user_agent in _get_false_positives():
         return False, None
     try:
-        matched = evaluate_user_agent_against_pattern(rule.pattern, user_agent)
+        matched = _search(rule.pattern, user_agent)
     except re.error:
         return False, None
     if not matched:
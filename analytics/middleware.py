@@ -55,7 +55,7 @@ class AnalyticsMiddleware(MiddlewareMixin):
                 suspected_bot_pattern_version=pattern_version,
             )
 
-            enqueue_user_agent_lookup(visit.id, visit.user_agent)
+            enqueue_user_agent_lookup(visit.user_agent)
             request.visit_id = visit.id
         except DatabaseError:
             # Clear rollback flag so analytics hiccups don't poison the request transaction.
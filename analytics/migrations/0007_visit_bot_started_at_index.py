@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics", "0006_visit_bot_detection_fields_and_models"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="visit",
+            name="is_suspected_bot",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="visit",
+            index=models.Index(
+                fields=["is_suspected_bot", "started_at"],
+                name="analytics_v_is_susp_cd2d39_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+HASH_INDEX_NAME = "analytics_visit_user_agent_hash"
+
+
+def create_hash_index(apps, schema_editor):
+    # Equality lookups (ignore/false-positive actions) still need an index,
+    # but a btree over long user agent strings is costly to maintain and
+    # can exceed PostgreSQL's index row size. Hash indexes are PostgreSQL only.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {HASH_INDEX_NAME} "
+        "ON analytics_visit USING hash (user_agent)"
+    )
+
+
+def drop_hash_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {HASH_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics", "0007_visit_bot_started_at_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="visit",
+            name="user_agent",
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(create_hash_index, reverse_code=drop_hash_index),
+    ]
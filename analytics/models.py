@@ -1,5 +1,8 @@
+from typing import NamedTuple
+
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
 
 
 class Visit(models.Model):
@@ -8,7 +11,7 @@ class Visit(models.Model):
         settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
     )
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.TextField(blank=True, db_index=True)
+    user_agent = models.TextField(blank=True)
     path = models.CharField(max_length=512)
     referrer = models.TextField(blank=True)
     started_at = models.DateTimeField(auto_now_add=True)
@@ -19,7 +22,7 @@ class Visit(models.Model):
     city = models.CharField(max_length=128, blank=True)
     response_status_code = models.IntegerField(null=True, blank=True)
     user_agent_details = models.JSONField(null=True, blank=True)
-    is_suspected_bot = models.BooleanField(default=False, db_index=True)
+    is_suspected_bot = models.BooleanField(default=False)
     suspected_bot_pattern_version = models.PositiveIntegerField(null=True, blank=True)
 
     def __str__(self):
@@ -29,6 +32,7 @@ class Visit(models.Model):
         indexes = [
             models.Index(fields=["path"]),
             models.Index(fields=["session_key", "started_at"]),
+            models.Index(fields=["is_suspected_bot", "started_at"]),
         ]
 
 
@@ -40,7 +44,16 @@ class UserAgentIgnore(models.Model):
         return self.user_agent
 
 
+class BotRuleState(NamedTuple):
+    version: int
+    enabled: bool
+    pattern: str
+
+
 class UserAgentBotRule(models.Model):
+    CACHE_KEY = "analytics:bot_rule"
+    CACHE_TIMEOUT = 60 * 5
+
     pattern = models.TextField(blank=True, default="")
     enabled = models.BooleanField(default=False)
     version = models.PositiveIntegerField(default=1)
@@ -64,6 +77,10 @@ class UserAgentBotRule(models.Model):
                 self.version = previous["version"] + 1
         super().save(*args, **kwargs)
 
+    @property
+    def state(self):
+        return BotRuleState(self.version, self.enabled, self.pattern)
+
     @classmethod
     def get_current(cls):
         rule = cls.objects.order_by("id").first()
@@ -71,6 +88,23 @@ class UserAgentBotRule(models.Model):
             return rule
         return cls.objects.create()
 
+    @classmethod
+    def get_cached(cls):
+        """Return the current rule as a lightweight ``BotRuleState``.
+
+        The cache is per process, so a save only clears it in the saving
+        process; others serve the old rule for up to ``CACHE_TIMEOUT``.
+        """
+        state = cache.get(cls.CACHE_KEY)
+        if state is None:
+            state = cls.get_current().state
+            cache.set(cls.CACHE_KEY, state, timeout=cls.CACHE_TIMEOUT)
+        return state
+
+    @classmethod
+    def invalidate_cache(cls):
+        cache.delete(cls.CACHE_KEY)
+
 
 class UserAgentFalsePositive(models.Model):
     user_agent = models.TextField(unique=True)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bot_detection import invalidate_false_positives
+from .models import UserAgentBotRule
+
+
+@receiver(post_save, sender="analytics.UserAgentFalsePositive")
+@receiver(post_delete, sender="analytics.UserAgentFalsePositive")
+def false_positive_changed(sender, instance, **kwargs):
+    invalidate_false_positives()
+
+
+@receiver(post_save, sender="analytics.UserAgentBotRule")
+@receiver(post_delete, sender="analytics.UserAgentBotRule")
+def bot_rule_changed(sender, instance, **kwargs):
+    UserAgentBotRule.invalidate_cache()
@@ -2,16 +2,28 @@ from celery import shared_task
 
 
 @shared_task
-def lookup_user_agent(visit_id: int, user_agent: str) -> None:
+def lookup_user_agent(user_agent: str) -> None:
     from django.db import close_old_connections
 
     from analytics.models import Visit
     from analytics.user_agents import _fetch_user_agent_details
 
-    close_old_connections()
+    # Celery's Django fixup already recycles stale connections before each
+    # task; only clean up after the update.
     try:
-        details = _fetch_user_agent_details(user_agent)
+        # One task is queued per visit, but each fills in every visit still
+        # missing details, so later tasks for the same user agent are no-ops.
+        pending = Visit.objects.filter(user_agent=user_agent, user_agent_details__isnull=True)
+        if not pending.exists():
+            return
+        # Visits already looked up act as the persistent details cache; it is
+        # shared by every worker, unlike the per-process Django cache.
+        details = Visit.objects.filter(
+            user_agent=user_agent, user_agent_details__isnull=False
+        ).values_list("user_agent_details", flat=True).first()
+        if details is None:
+            details = _fetch_user_agent_details(user_agent)
         if details:
-            Visit.objects.filter(id=visit_id).update(user_agent_details=details)
+            pending.update(user_agent_details=details)
     finally:
         close_old_connections()
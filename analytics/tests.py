@@ -1,17 +1,34 @@
 import json
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
 
 from blog.models import Post, Tag
+from analytics.bot_detection import (
+    MAX_PATTERN_LENGTH,
+    MAX_USER_AGENT_LENGTH,
+    evaluate_user_agent_against_pattern,
+    should_flag_user_agent,
+    validate_bot_pattern,
+)
 from analytics.models import UserAgentBotRule, UserAgentFalsePositive, UserAgentIgnore, Visit
+from analytics.tasks import lookup_user_agent
+from analytics.user_agents import (
+    _fetch_user_agent_details,
+    enqueue_user_agent_lookup,
+)
 
 
 MICROPUB_URL = "/micropub"
 
 
 class AnalyticsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
     @patch("analytics.middleware.Visit.objects.create", side_effect=IntegrityError)
     @patch("micropub.views._authorized", return_value=(True, ["update"]))
     def test_db_error_does_not_break_request_transaction(self, _authorized, _visit_create):
@@ -46,7 +63,7 @@ class AnalyticsMiddlewareTests(TestCase):
 
         self.assertEqual(response.status_code, 404)
         enqueue_lookup.assert_called_once()
-        self.assertEqual(enqueue_lookup.call_args[0], (123, user_agent))
+        self.assertEqual(enqueue_lookup.call_args[0], (user_agent,))
         create_visit.assert_called_once()
 
     @patch("analytics.middleware.Visit.objects.create")
@@ -92,3 +109,135 @@ class AnalyticsMiddlewareTests(TestCase):
 
         self.assertEqual(response.status_code, 404)
         self.assertFalse(Visit.objects.filter(user_agent="AuditBot/1.0").exists())
+
+
+class BotDetectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rule_update_recompiles_pattern(self):
+        rule = UserAgentBotRule.objects.create(enabled=True, pattern=r"(?i)bot")
+
+        self.assertEqual(should_flag_user_agent("AuditBot/1.0"), (True, rule.version))
+
+        rule.pattern = r"(?i)crawler"
+        rule.save()
+
+        self.assertEqual(should_flag_user_agent("AuditBot/1.0"), (False, None))
+        self.assertEqual(
+            should_flag_user_agent("AuditCrawler/1.0"), (True, rule.version)
+        )
+
+    def test_match_is_limited_to_max_user_agent_length(self):
+        padded = "x" * MAX_USER_AGENT_LENGTH
+
+        self.assertFalse(evaluate_user_agent_against_pattern(r"bot", padded + "bot"))
+        self.assertTrue(evaluate_user_agent_against_pattern(r"x$", padded + "bot"))
+
+    def test_validate_rejects_nested_repeats(self):
+        with self.assertRaises(ValueError):
+            validate_bot_pattern(r"(\w+\s?)+\1")
+        validate_bot_pattern(r"(?i)(bot|crawler)/\1")
+
+    def test_nested_repeat_check_is_best_effort(self):
+        # Known misses: deeper nesting and overlapping alternation.
+        validate_bot_pattern(r"((a+))+")
+        validate_bot_pattern(r"(a|aa)+")
+        # Known false positive: the repeat can't overlap across the "." here.
+        with self.assertRaises(ValueError):
+            validate_bot_pattern(r"(\d+\.)+")
+
+    def test_validate_rejects_overlong_pattern(self):
+        with self.assertRaises(ValueError):
+            validate_bot_pattern("a" * (MAX_PATTERN_LENGTH + 1))
+
+    def test_evaluation_reuses_compiled_pattern(self):
+        evaluate_user_agent_against_pattern(r"(?i)bot", "AuditBot/1.0")
+
+        with patch("analytics.bot_detection.re.compile") as compile_pattern:
+            self.assertTrue(evaluate_user_agent_against_pattern(r"(?i)bot", "OtherBot/2.0"))
+
+        compile_pattern.assert_not_called()
+
+    def test_false_positive_changes_invalidate_cached_set(self):
+        rule = UserAgentBotRule.objects.create(enabled=True, pattern=r"(?i)bot")
+        self.assertEqual(should_flag_user_agent("AuditBot/1.0"), (True, rule.version))
+
+        false_positive = UserAgentFalsePositive.objects.create(user_agent="AuditBot/1.0")
+        self.assertEqual(should_flag_user_agent("AuditBot/1.0"), (False, None))
+
+        false_positive.delete()
+        self.assertEqual(should_flag_user_agent("AuditBot/1.0"), (True, rule.version))
+
+    def test_bot_rule_is_cached_between_requests(self):
+        rule = UserAgentBotRule.objects.create(enabled=True, pattern=r"(?i)bot")
+        should_flag_user_agent("AuditBot/1.0")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                should_flag_user_agent("AuditBot/1.0"), (True, rule.version)
+            )
+
+        rule.enabled = False
+        rule.save()
+        self.assertEqual(should_flag_user_agent("AuditBot/1.0"), (False, None))
+
+
+class UserAgentLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("analytics.tasks.lookup_user_agent.delay")
+    def test_lookup_is_enqueued_by_user_agent(self, delay):
+        enqueue_user_agent_lookup("Browser/1.0")
+        enqueue_user_agent_lookup("")
+
+        delay.assert_called_once_with("Browser/1.0")
+
+    @patch("analytics.user_agents._fetch_user_agent_details")
+    def test_lookup_task_backfills_pending_visits(self, fetch_details):
+        fetch_details.return_value = {"browser": "Browser"}
+        first = Visit.objects.create(path="/", user_agent="Browser/1.0")
+        second = Visit.objects.create(path="/", user_agent="Browser/1.0")
+        other = Visit.objects.create(path="/", user_agent="Other/2.0")
+
+        lookup_user_agent("Browser/1.0")
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(first.user_agent_details, {"browser": "Browser"})
+        self.assertEqual(second.user_agent_details, {"browser": "Browser"})
+        self.assertIsNone(other.user_agent_details)
+
+    @patch("analytics.user_agents._fetch_user_agent_details")
+    def test_lookup_task_reuses_stored_details(self, fetch_details):
+        Visit.objects.create(
+            path="/", user_agent="Browser/1.0", user_agent_details={"browser": "Browser"}
+        )
+        pending = Visit.objects.create(path="/", user_agent="Browser/1.0")
+
+        lookup_user_agent("Browser/1.0")
+
+        fetch_details.assert_not_called()
+        pending.refresh_from_db()
+        self.assertEqual(pending.user_agent_details, {"browser": "Browser"})
+
+    @patch("analytics.user_agents._fetch_user_agent_details")
+    def test_lookup_task_skips_backfilled_user_agents(self, fetch_details):
+        Visit.objects.create(
+            path="/", user_agent="Browser/1.0", user_agent_details={"browser": "Browser"}
+        )
+
+        lookup_user_agent("Browser/1.0")
+
+        fetch_details.assert_not_called()
+
+    @patch("analytics.user_agents._SESSION.get")
+    def test_details_are_cached_by_user_agent(self, requests_get):
+        requests_get.return_value.json.return_value = {"browser": "Browser"}
+
+        self.assertEqual(_fetch_user_agent_details("Browser/1.0"), {"browser": "Browser"})
+        self.assertEqual(_fetch_user_agent_details("Browser/1.0"), {"browser": "Browser"})
+
+        requests_get.assert_called_once()
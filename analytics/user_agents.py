@@ -1,33 +1,64 @@
+import hashlib
 from typing import Any, Optional
 
 import requests
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 
 API_URL = "https://api.apicagent.com"
 REQUEST_TIMEOUT_SECONDS = 2
+DETAILS_CACHE_TIMEOUT_SECONDS = 60 * 60 * 24 * 30
+
+# Shared keep-alive session so repeated lookups from a worker reuse the TLS
+# connection to the API instead of handshaking on every call.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+)
+
+
+def _user_agent_digest(user_agent: str) -> str:
+    return hashlib.sha1(user_agent.encode()).hexdigest()
+
+
+def details_cache_key(user_agent: str) -> str:
+    return f"analytics:ua:{_user_agent_digest(user_agent)}"
 
 
 def _fetch_user_agent_details(user_agent: str) -> Optional[dict[str, Any]]:
     if not user_agent:
         return None
 
+    cache_key = details_cache_key(user_agent)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.get(
+        response = _SESSION.get(
             API_URL,
             params={"ua": user_agent},
             timeout=REQUEST_TIMEOUT_SECONDS,
         )
         response.raise_for_status()
         data = response.json()
-        return data if isinstance(data, dict) else None
     except Exception:
         return None
+    if not isinstance(data, dict):
+        return None
+    cache.set(cache_key, data, timeout=DETAILS_CACHE_TIMEOUT_SECONDS)
+    return data
 
 
-def enqueue_user_agent_lookup(visit_id: int, user_agent: str) -> None:
-    """Fire-and-forget user agent lookup to avoid blocking responses."""
-    if not visit_id or not user_agent:
+def enqueue_user_agent_lookup(user_agent: str) -> None:
+    """Fire-and-forget user agent lookup to avoid blocking responses.
+
+    The task fills in every visit still missing details for the user agent,
+    so later tasks for the same user agent usually find nothing to do.
+    """
+    if not user_agent:
         return
 
     from analytics.tasks import lookup_user_agent
 
-    lookup_user_agent.delay(visit_id, user_agent)
+    lookup_user_agent.delay(user_agent)
@@ -1,93 +1,111 @@
+from typing import NamedTuple
+
 from django.contrib.syndication.views import Feed
-from django.urls import reverse
 from django.urls import NoReverseMatch
 from django.utils.feedgenerator import Rss201rev2Feed
-from django.template.loader import render_to_string
+from django.template.loader import get_template
 
 from core.models import SiteConfiguration
 from core.og import absolute_url
 from core.themes import get_posts_index_url
 from .models import Post
-from .views import _interaction_payload
+from .views import (
+    _attachments_prefetch,
+    _filter_by_all_tags,
+    _interaction_payload,
+    _local_targets_for_posts,
+    _split_filter_values,
+)
+
+
+class FeedRender(NamedTuple):
+    """Per-request feed state.
+
+    One PostsFeed instance serves every request, so nothing request-specific
+    may live on it; Feed hands this to the feed-level methods as ``obj``.
+    """
+
+    request: object
+    url_prefix: str
+    site_config: SiteConfiguration
+    # Resolved once per render; the active theme decides which file wins.
+    item_template: object
+
+    def absolute_url(self, url):
+        if not url or url.startswith(("http://", "https://")):
+            return url
+        if url.startswith("/") and not url.startswith("//"):
+            return self.url_prefix + url
+        return absolute_url(self.request, url)
 
 
 class PostsFeed(Feed):
     feed_type = Rss201rev2Feed
 
-    def title(self):
-        settings = SiteConfiguration.get_solo()
-        return f"{settings.title} posts"
+    def get_object(self, request):
+        return FeedRender(
+            request=request,
+            url_prefix=request.build_absolute_uri("/").rstrip("/"),
+            site_config=SiteConfiguration.get_solo(),
+            item_template=get_template("blog/feed_item.html"),
+        )
+
+    def title(self, obj):
+        return f"{obj.site_config.title} posts"
 
     def link(self):
         return get_posts_index_url()
 
-    def description(self):
-        settings = SiteConfiguration.get_solo()
-        return settings.tagline
+    def description(self, obj):
+        return obj.site_config.tagline
 
-    def feed_url(self):
-        if hasattr(self, "request"):
-            try:
-                return self.request.build_absolute_uri()
-            except NoReverseMatch:
-                return None
-        return reverse("posts_feed")
+    def feed_url(self, obj):
+        try:
+            return obj.request.build_absolute_uri()
+        except NoReverseMatch:
+            return None
 
-    def get_object(self, request):
-        self.request = request
-        return None
-
-    def items(self, obj=None):
-        request = getattr(self, "request", None)
-
-        selected_kinds = []
-        selected_tags = []
-        if request:
-            for value in request.GET.getlist("kind"):
-                selected_kinds.extend(
-                    [chunk.strip().lower() for chunk in value.split(",") if chunk.strip()]
-                )
-            for value in request.GET.getlist("tag"):
-                selected_tags.extend(
-                    [chunk.strip().lower() for chunk in value.split(",") if chunk.strip()]
-                )
-        seen_kinds = set()
-        selected_kinds = [kind for kind in selected_kinds if not (kind in seen_kinds or seen_kinds.add(kind))]
-        seen_tags = set()
-        selected_tags = [tag for tag in selected_tags if not (tag in seen_tags or seen_tags.add(tag))]
+    def items(self, obj):
+        request = obj.request
+        selected_kinds = _split_filter_values(request.GET.getlist("kind"))
+        selected_tags = _split_filter_values(request.GET.getlist("tag"))
         valid_kinds = {kind for kind, _ in Post.KIND_CHOICES}
         selected_kinds = [kind for kind in selected_kinds if kind in valid_kinds]
 
         queryset = (
             Post.objects.exclude(published_on__isnull=True)
             .filter(deleted=False)
-            .prefetch_related("attachments__asset")
+            .prefetch_related(_attachments_prefetch())
             .order_by("-published_on")
         )
         if selected_kinds:
             queryset = queryset.filter(kind__in=selected_kinds)
-        for tag in selected_tags:
-            queryset = queryset.filter(tags__tag=tag)
-        queryset = queryset.distinct()
-        return queryset
-
-    def item_title(self, item):
-        return item.title
-
-    def item_description(self, item):
-        request = getattr(self, "request", None)
-        interaction = (
-            _interaction_payload(item, request=request, fetch_remote=False)
-            if item.kind in (Post.LIKE, Post.REPOST, Post.REPLY)
-            else None
-        )
-        if interaction and request:
+        queryset = _filter_by_all_tags(queryset, selected_tags)
+
+        items = list(queryset)
+        interaction_items = [
+            item for item in items if item.kind in (Post.LIKE, Post.REPOST, Post.REPLY)
+        ]
+        local_targets = _local_targets_for_posts(interaction_items, request)
+        for item in interaction_items:
+            item.interaction = _interaction_payload(
+                item, request=request, fetch_remote=False, local_targets=local_targets
+            )
+        # Item methods only receive the item, so render descriptions here
+        # while the per-request state is in hand.
+        for item in items:
+            item.feed_description = self._render_description(obj, item)
+        return items
+
+    def _render_description(self, obj, item):
+        interaction = getattr(item, "interaction", None)
+        if interaction:
             target_url = interaction.get("target_url")
             if target_url:
-                interaction["target_url"] = absolute_url(request, target_url)
+                interaction["target_url"] = obj.absolute_url(target_url)
             target = interaction.get("target")
             if target and target.get("original_url"):
-                target["original_url"] = absolute_url(request, target["original_url"])
+                target["original_url"] = obj.absolute_url(target["original_url"])
         media_items = []
         track_url = ""
 
@@ -95,7 +113,7 @@ class PostsFeed(Feed):
             asset = getattr(attachment, "asset", None)
             if not asset or not asset.file:
                 continue
-            url = absolute_url(request, asset.file.url) if request else asset.file.url
+            url = obj.absolute_url(asset.file.url)
             if attachment.role == "gpx":
                 track_url = url
                 continue
@@ -109,17 +127,22 @@ class PostsFeed(Feed):
                 }
             )
 
-        return render_to_string(
-            "blog/feed_item.html",
+        return obj.item_template.render(
             {
                 "post": item,
-                "post_url": absolute_url(request, item.get_absolute_url()) if request else item.get_absolute_url(),
+                "post_url": obj.absolute_url(item.get_absolute_url()),
                 "interaction": interaction,
                 "media_items": media_items,
                 "track_url": track_url,
             },
         )
 
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.feed_description
+
     def item_link(self, item):
         return item.get_absolute_url()
 
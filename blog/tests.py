@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase, RequestFactory
 from django.test.utils import override_settings
-from django.urls import reverse
+from django.urls import resolve, reverse
 from django.utils import timezone
 
 from .models import Comment, Post, Tag
@@ -625,6 +625,79 @@ class PostFilterTests(TestCase):
         self.assertEqual(response["Location"], "/?tag=arcane")
 
 
+class PostsFeedTests(TestCase):
+    def setUp(self):
+        tag_arcane = Tag.objects.create(tag="arcane")
+        tag_docker = Tag.objects.create(tag="docker")
+
+        article = Post.objects.create(
+            title="Arcane Docker",
+            slug="arcane-docker",
+            content="text",
+            kind=Post.ARTICLE,
+            published_on=timezone.now(),
+        )
+        article.tags.add(tag_arcane, tag_docker)
+
+        note = Post.objects.create(
+            title="Arcane Note",
+            slug="arcane-note",
+            content="text",
+            kind=Post.NOTE,
+            published_on=timezone.now(),
+        )
+        note.tags.add(tag_arcane)
+
+    def test_feed_requires_every_selected_tag(self):
+        response = self.client.get(reverse("posts_feed"), {"tag": "arcane,docker"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "<title>Arcane Docker</title>")
+        self.assertNotContains(response, "<title>Arcane Note</title>")
+
+    def test_feed_normalizes_repeated_filter_values(self):
+        response = self.client.get(
+            reverse("posts_feed"),
+            {"tag": ["Arcane, docker", "ARCANE"], "kind": "article,bogus"},
+        )
+
+        self.assertContains(response, "<title>Arcane Docker</title>")
+        self.assertNotContains(response, "<title>Arcane Note</title>")
+
+    def test_feed_resolves_local_interaction_targets(self):
+        for index in range(2):
+            Post.objects.create(
+                title=f"Like {index}",
+                slug=f"like-{index}",
+                content="",
+                kind=Post.LIKE,
+                like_of="/blog/post/arcane-note/",
+                published_on=timezone.now(),
+            )
+
+        response = self.client.get(reverse("posts_feed"), {"kind": "like"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Arcane Note&lt;/a&gt;", count=2)
+
+    def test_feed_lists_all_posts_without_filters(self):
+        response = self.client.get(reverse("posts_feed"))
+
+        self.assertContains(response, "<title>Arcane Docker</title>")
+        self.assertContains(response, "<title>Arcane Note</title>")
+
+    @override_settings(ALLOWED_HOSTS=["one.example", "two.example"])
+    def test_feed_keeps_request_state_off_the_shared_view(self):
+        feed = resolve(reverse("posts_feed")).func
+
+        self.client.get(reverse("posts_feed"), HTTP_HOST="one.example")
+        response = self.client.get(reverse("posts_feed"), HTTP_HOST="two.example")
+
+        self.assertContains(response, "http://two.example/blog/post/arcane-note/")
+        self.assertNotContains(response, "one.example")
+        self.assertEqual(vars(feed), {})
+
+
 class CommentSubmissionTests(TestCase):
     def setUp(self):
         self.post = Post.objects.create(
@@ -4,7 +4,7 @@ from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.validators import URLValidator
-from django.db.models import Count, Q
+from django.db.models import Count, Prefetch, Q
 from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.urls import reverse
@@ -21,6 +21,7 @@ from .comments import AkismetError, check_comment, comments_configured, verify_t
 from core.models import SiteConfiguration
 from core.themes import get_posts_index_url, should_redirect_posts_index
 from core.og import absolute_url, first_attachment_image_url
+from files.models import Attachment
 from micropub.models import Webmention
 
 
@@ -44,6 +45,10 @@ def _activity_from_mf2(post):
     return activity
 
 
+def _attachments_prefetch():
+    return Prefetch("attachments", queryset=Attachment.objects.select_related("asset"))
+
+
 def _staff_guard(request):
     if not request.user.is_authenticated or not request.user.is_staff:
         return HttpResponse(status=401)
@@ -66,7 +71,7 @@ def _is_default_interaction_content(post, target_url):
     return False
 
 
-def _local_target_from_url(target_url, request):
+def _local_target_slug(target_url, request):
     if not target_url:
         return None
     parsed = urlparse(target_url)
@@ -81,14 +86,22 @@ def _local_target_from_url(target_url, request):
         return None
 
     slug = parsed.path.rstrip("/").split("/")[-1]
+    return slug or None
+
+
+def _local_target_from_url(target_url, request, local_targets=None):
+    slug = _local_target_slug(target_url, request)
     if not slug:
         return None
 
-    target_post = (
-        Post.objects.filter(slug=slug, deleted=False, published_on__isnull=False)
-        .only("title", "content")
-        .first()
-    )
+    if local_targets is not None:
+        target_post = local_targets.get(slug)
+    else:
+        target_post = (
+            Post.objects.filter(slug=slug, deleted=False, published_on__isnull=False)
+            .only("title", "content")
+            .first()
+        )
     if not target_post:
         return None
 
@@ -105,29 +118,30 @@ def _local_target_from_url(target_url, request):
     }
 
 
-def _interaction_payload(post, request=None, fetch_remote=True):
+def _interaction_target(post):
     if post.kind == Post.LIKE:
-        target_url = post.like_of
-        label = "Liked"
-    elif post.kind == Post.REPOST:
-        target_url = post.repost_of
-        label = "Reposted"
-    elif post.kind == Post.REPLY:
-        target_url = post.in_reply_to
-        label = "Replying to"
-    elif post.kind == Post.RSVP:
-        target_url = post.in_reply_to
-        label = "RSVP to"
-    elif post.kind == Post.BOOKMARK:
-        target_url = post.bookmark_of
-        label = "Bookmarked"
-    else:
+        return post.like_of, "Liked"
+    if post.kind == Post.REPOST:
+        return post.repost_of, "Reposted"
+    if post.kind == Post.REPLY:
+        return post.in_reply_to, "Replying to"
+    if post.kind == Post.RSVP:
+        return post.in_reply_to, "RSVP to"
+    if post.kind == Post.BOOKMARK:
+        return post.bookmark_of, "Bookmarked"
+    return None
+
+
+def _interaction_payload(post, request=None, fetch_remote=True, local_targets=None):
+    interaction_target = _interaction_target(post)
+    if interaction_target is None:
         return None
+    target_url, label = interaction_target
 
     target_url = target_url or ""
     target = fetch_target_from_url(target_url) if (fetch_remote and target_url) else None
     if not target and target_url:
-        target = _local_target_from_url(target_url, request)
+        target = _local_target_from_url(target_url, request, local_targets)
 
     return {
         "kind": post.kind,
@@ -138,6 +152,24 @@ def _interaction_payload(post, request=None, fetch_remote=True):
     }
 
 
+def _local_targets_for_posts(posts, request=None):
+    """Resolve local interaction targets for ``posts`` in a single query."""
+    slugs = set()
+    for post in posts:
+        interaction_target = _interaction_target(post)
+        if interaction_target is None:
+            continue
+        slug = _local_target_slug(interaction_target[0], request)
+        if slug:
+            slugs.add(slug)
+    if not slugs:
+        return {}
+    targets = Post.objects.filter(
+        slug__in=slugs, deleted=False, published_on__isnull=False
+    ).only("title", "content", "slug")
+    return {target.slug: target for target in targets}
+
+
 def _normalize_webmention_reply(source_url, created_at, payload):
     author_name = payload.get("author_name") or payload.get("author_url") or source_url
     author_url = payload.get("author_url") or source_url
@@ -275,22 +307,28 @@ def _post_context(request, post, *, comment_form=None):
     return context
 
 def _split_filter_values(values):
-    items = []
-    for value in values:
-        if value is None:
-            continue
-        for chunk in value.split(","):
-            chunk = chunk.strip()
-            if chunk:
-                items.append(chunk.lower())
-    seen = set()
-    deduped = []
-    for item in items:
-        if item in seen:
-            continue
-        seen.add(item)
-        deduped.append(item)
-    return deduped
+    """Split comma separated query values into lowercase, de-duplicated items."""
+    return list(
+        dict.fromkeys(
+            chunk.lower()
+            for value in values
+            if value is not None
+            for raw_chunk in value.split(",")
+            if (chunk := raw_chunk.strip())
+        )
+    )
+
+def _filter_by_all_tags(query_set, tags):
+    """Keep posts tagged with every one of ``tags`` using a single join."""
+    if not tags:
+        return query_set
+    return (
+        query_set.filter(tags__tag__in=tags)
+        .annotate(
+            matched_tags=Count("tags", filter=Q(tags__tag__in=tags), distinct=True)
+        )
+        .filter(matched_tags=len(tags))
+    )
 
 def _build_filter_query(selected_kinds, selected_tags):
     params = []
@@ -302,7 +340,7 @@ def _build_filter_query(selected_kinds, selected_tags):
 
 
 def build_posts_listing_context(request, *, include_og=True):
-    settings = SiteConfiguration.get_solo()
+    settings = SiteConfiguration.for_request(request)
     requested_kinds = _split_filter_values(request.GET.getlist("kind"))
     selected_tags = _split_filter_values(request.GET.getlist("tag"))
     valid_kinds = {kind for kind, _ in Post.KIND_CHOICES}
@@ -329,16 +367,18 @@ def build_posts_listing_context(request, *, include_og=True):
 
     query_set = (
         Post.objects.select_related("author")
-        .prefetch_related("author__hcards", "tags")
+        .prefetch_related(
+            "author__hcards",
+            "tags",
+            _attachments_prefetch(),
+        )
         .exclude(published_on__isnull=True)
         .filter(deleted=False)
         .order_by("-published_on")
     )
     if selected_kinds:
         query_set = query_set.filter(kind__in=selected_kinds)
-    for tag in selected_tags:
-        query_set = query_set.filter(tags__tag=tag)
-    query_set = query_set.distinct()
+    query_set = _filter_by_all_tags(query_set, selected_tags)
 
     paginator = Paginator(query_set, 10)
     page_number = request.GET.get("page")
@@ -350,6 +390,10 @@ def build_posts_listing_context(request, *, include_og=True):
     except EmptyPage:
         posts = paginator.page(paginator.num_pages)
 
+    interaction_kinds = (Post.LIKE, Post.REPLY, Post.REPOST, Post.BOOKMARK)
+    local_targets = _local_targets_for_posts(
+        [post for post in posts if post.kind in interaction_kinds], request
+    )
     has_activity = False
     for post in posts:
         if post.kind == Post.ACTIVITY:
@@ -361,8 +405,10 @@ def build_posts_listing_context(request, *, include_og=True):
         elif post.kind == Post.CHECKIN:
             mf2_data = post.mf2 if isinstance(post.mf2, dict) else {}
             post.checkin_data = mf2_data.get("checkin")
-        elif post.kind in (Post.LIKE, Post.REPLY, Post.REPOST, Post.BOOKMARK):
-            post.interaction = _interaction_payload(post, request=request)
+        elif post.kind in interaction_kinds:
+            post.interaction = _interaction_payload(
+                post, request=request, local_targets=local_targets
+            )
 
     context = {
         "posts": posts,
@@ -455,7 +501,7 @@ def post(request, slug):
         Post.objects.select_related("author").prefetch_related(
             "author__hcards",
             "tags",
-            "attachments__asset",
+            _attachments_prefetch(),
         ),
         slug=slug,
         deleted=False,
@@ -471,7 +517,7 @@ def comment_create(request, slug):
         Post.objects.select_related("author").prefetch_related(
             "author__hcards",
             "tags",
-            "attachments__asset",
+            _attachments_prefetch(),
         ),
         slug=slug,
         deleted=False,
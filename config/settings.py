@@ -193,6 +193,10 @@ else:
                 "PASSWORD": env("DB_PASS"),
                 "HOST": env("DB_HOST"),
                 "PORT": env("DB_PORT"),
+                # Keep connections open between requests so short queries
+                # (IndieAuth token checks, Micropub auth) skip connection setup.
+                "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=60),
+                "CONN_HEALTH_CHECKS": True,
             }
         }
 
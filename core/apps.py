@@ -71,6 +71,8 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
+        import core.signals  # noqa
+
         reconcile_enabled = getattr(settings, "THEMES_STARTUP_RECONCILE", True)
         startup_sync_enabled = getattr(settings, "THEME_STARTUP_SYNC_ENABLED", True)
 
@@ -1,23 +1,33 @@
-import markdown
-
+from django.core.cache import cache
 from django.urls import NoReverseMatch, reverse
 from django.utils.safestring import mark_safe
 from django.db.models import Q
 
-from .models import HCard, SiteConfiguration
+from .models import HCard, MenuItem, SiteConfiguration
 from .og import default_image_url
 from .themes import get_active_theme, resolve_theme_settings, get_active_theme_settings, get_posts_index_url, get_active_theme_widget_areas
 from blog.models import Comment
 from micropub.models import Webmention
 
+PENDING_INTERACTIONS_CACHE_KEY = "core:interactions_pending"
+# The cache is per process, so moderating clears the count only in the process
+# that handled it; other processes can show the old badge for this long.
+PENDING_INTERACTIONS_CACHE_TIMEOUT = 10
+# The admin badge only needs to say "lots"; stop counting past this many rows.
+PENDING_INTERACTIONS_CAP = 100
+
+
 def site_configuration(request):
-    settings = SiteConfiguration.get_solo()
+    settings = SiteConfiguration.for_request(request)
     menu_items = None
     footer_menu_items = None
-    if settings.main_menu is not None:
-        menu_items = settings.main_menu.menuitem_set.all()
-    if settings.footer_menu is not None:
-        footer_menu_items = settings.footer_menu.menuitem_set.all()
+    menu_ids = [menu_id for menu_id in (settings.main_menu_id, settings.footer_menu_id) if menu_id]
+    if menu_ids:
+        items_by_menu = {menu_id: [] for menu_id in menu_ids}
+        for item in MenuItem.objects.filter(menu_id__in=menu_ids):
+            items_by_menu[item.menu_id].append(item)
+        menu_items = items_by_menu.get(settings.main_menu_id)
+        footer_menu_items = items_by_menu.get(settings.footer_menu_id)
 
     site_author_hcard = None
     site_author_display_name = ""
@@ -28,7 +38,7 @@ def site_configuration(request):
             or ""
         )
         site_author_hcard = (
-            settings.site_author.hcards.prefetch_related("photos", "urls")
+            settings.site_author.hcards.prefetch_related(HCard.photos_prefetch(), "urls")
             .order_by("pk")
             .first()
         )
@@ -37,8 +47,7 @@ def site_configuration(request):
         site_author_display_name = site_author_hcard.name
 
     if site_author_hcard:
-        md = markdown.Markdown(extensions=["fenced_code"])
-        site_author_hcard.note_html = mark_safe(md.convert(site_author_hcard.note or ""))
+        site_author_hcard.note_html = mark_safe(site_author_hcard.note_html)
 
     feed_url = None
     try:
@@ -46,9 +55,9 @@ def site_configuration(request):
     except NoReverseMatch:
         feed_url = None
 
-    theme_settings = get_active_theme_settings()
+    theme_settings = get_active_theme_settings(settings)
     home_feed_mode = theme_settings.get("home_feed_mode", "blog")
-    posts_index_url = get_posts_index_url()
+    posts_index_url = get_posts_index_url(theme_settings)
 
     og_default_image = default_image_url(request, settings=settings, site_author_hcard=site_author_hcard)
 
@@ -66,8 +75,8 @@ def site_configuration(request):
 
 
 def theme(request):
-    active_theme = get_active_theme()
-    settings_obj = SiteConfiguration.get_solo()
+    settings_obj = SiteConfiguration.for_request(request)
+    active_theme = get_active_theme(settings_obj)
     theme_settings = {}
     theme_settings_schema = {}
     if active_theme:
@@ -93,14 +102,43 @@ def theme(request):
     }
 
 
+def invalidate_pending_interactions_count():
+    cache.delete(PENDING_INTERACTIONS_CACHE_KEY)
+
+
+def _pending_interactions_count(host):
+    counts = cache.get(PENDING_INTERACTIONS_CACHE_KEY) or {}
+    if host in counts:
+        return counts[host]
+
+    target_query = Q(target__startswith=f"http://{host}") | Q(target__startswith=f"https://{host}")
+    pending_comments = Comment.objects.filter(status=Comment.PENDING).order_by().values("pk")
+    pending_webmentions = (
+        Webmention.objects.filter(status=Webmention.PENDING)
+        .filter(target_query)
+        .order_by()
+        .values("pk")
+    )
+    counts[host] = pending_comments.union(pending_webmentions, all=True)[
+        :PENDING_INTERACTIONS_CAP
+    ].count()
+    cache.set(PENDING_INTERACTIONS_CACHE_KEY, counts, PENDING_INTERACTIONS_CACHE_TIMEOUT)
+    return counts[host]
+
+
 def interactions_counts(request):
-    if not request.path.startswith("/admin/"):
+    # Only site admin views render the badge and profile chip. Matching on the
+    # resolved namespace keeps public pages (and other /admin/-prefixed paths
+    # that 404) from ever reaching the HCard and count queries below.
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None or resolver_match.app_name != "site_admin":
         return {}
 
     user = getattr(request, "user", None)
     if not user or not user.is_authenticated or not user.is_staff:
         return {
             "interactions_pending_count": 0,
+            "interactions_pending_capped": False,
             "admin_profile_photo_url": "",
             "admin_profile_display_name": "",
             "admin_profile_initials": "",
@@ -110,16 +148,18 @@ def interactions_counts(request):
     if not host:
         return {
             "interactions_pending_count": 0,
+            "interactions_pending_capped": False,
             "admin_profile_photo_url": "",
             "admin_profile_display_name": user.get_username(),
             "admin_profile_initials": (user.get_username() or "U")[:1].upper(),
         }
-    prefixes = [f"http://{host}", f"https://{host}"]
-    target_query = Q()
-    for prefix in prefixes:
-        target_query |= Q(target__startswith=prefix)
-
-    hcard = HCard.objects.filter(user=user).order_by("pk").first()
+    hcard = (
+        HCard.objects.filter(user=user)
+        .only("pk", "name")
+        .prefetch_related(HCard.photos_prefetch())
+        .order_by("pk")
+        .first()
+    )
     display_name = ""
     if hcard and hcard.name:
         display_name = hcard.name
@@ -135,14 +175,10 @@ def interactions_counts(request):
     else:
         initials = initials_source[:1].upper()
 
-    pending_comments = Comment.objects.filter(status=Comment.PENDING).count()
-    pending_webmentions = (
-        Webmention.objects.filter(status=Webmention.PENDING)
-        .filter(target_query)
-        .count()
-    )
+    pending_count = _pending_interactions_count(host)
     return {
-        "interactions_pending_count": pending_comments + pending_webmentions,
+        "interactions_pending_count": pending_count,
+        "interactions_pending_capped": pending_count >= PENDING_INTERACTIONS_CAP,
         "admin_profile_photo_url": hcard.primary_photo_url if hcard else "",
         "admin_profile_display_name": display_name,
         "admin_profile_initials": initials,
@@ -1,5 +1,7 @@
+import hashlib
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from botocore.config import Config
@@ -30,6 +32,42 @@ def _bucket_policy(bucket_name: str) -> dict:
     }
 
 
+POLICY_FINGERPRINT_TAG = "policy-sha256"
+
+
+def _policy_fingerprint(policy: dict) -> str:
+    canonical = json.dumps(policy, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _bucket_tags(client, bucket_name: str) -> dict[str, str] | None:
+    """Return the bucket's tags, or None when they cannot be read."""
+    try:
+        response = client.get_bucket_tagging(Bucket=bucket_name)
+    except ClientError as exc:
+        code = exc.response.get("Error", {}).get("Code")
+        if code in {"NoSuchTagSet", "NoSuchBucket"}:
+            return {}
+        return None
+    return {tag["Key"]: tag["Value"] for tag in response.get("TagSet", [])}
+
+
+def _store_policy_fingerprint(client, bucket_name: str, tags: dict[str, str] | None, fingerprint: str) -> None:
+    # put_bucket_tagging replaces the whole tag set, so only write when the
+    # existing tags are known and keep them alongside the fingerprint.
+    if tags is None:
+        return
+    tag_set = dict(tags)
+    tag_set[POLICY_FINGERPRINT_TAG] = fingerprint
+    try:
+        client.put_bucket_tagging(
+            Bucket=bucket_name,
+            Tagging={"TagSet": [{"Key": key, "Value": value} for key, value in tag_set.items()]},
+        )
+    except ClientError:
+        pass
+
+
 def _policy_needs_update(client, bucket_name: str, desired_policy: dict) -> bool:
     try:
         current = client.get_bucket_policy(Bucket=bucket_name)
@@ -37,8 +75,6 @@ def _policy_needs_update(client, bucket_name: str, desired_policy: dict) -> bool
         code = exc.response.get("Error", {}).get("Code")
         if code in {"NoSuchBucketPolicy", "NoSuchBucket"}:
             return True
-        if code in {"AccessDenied", "AllAccessDisabled"}:
-            return False
         raise
 
     current_policy = json.loads(current.get("Policy", "{}"))
@@ -72,18 +108,38 @@ class Command(BaseCommand):
             region_name=region_name,
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            config=Config(s3={"addressing_style": "path"}),
+            config=Config(
+                s3={"addressing_style": "path"},
+                max_pool_connections=2,
+                retries={"mode": "standard", "total_max_attempts": 3},
+            ),
         )
 
-        if create_bucket:
-            if _bucket_exists(client, bucket_name):
+        check_policy = set_policy and public_read
+        policy = _bucket_policy(bucket_name)
+        fingerprint = _policy_fingerprint(policy)
+        # The existence check and tag lookup are independent reads, so issue them together.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            exists_future = (
+                executor.submit(_bucket_exists, client, bucket_name) if create_bucket else None
+            )
+            tags_future = (
+                executor.submit(_bucket_tags, client, bucket_name) if check_policy else None
+            )
+
+        if exists_future is not None:
+            if exists_future.result():
                 self.stdout.write(f"Bucket '{bucket_name}' already exists.")
             else:
                 self._create_bucket(client, bucket_name, region_name)
                 self.stdout.write(self.style.SUCCESS(f"Created bucket '{bucket_name}'."))
 
-        if set_policy and public_read:
-            policy = _bucket_policy(bucket_name)
+        if tags_future is not None:
+            tags = tags_future.result()
+            if tags and tags.get(POLICY_FINGERPRINT_TAG) == fingerprint:
+                self.stdout.write(self.style.SUCCESS("Bucket policy already up to date."))
+                return
+
             try:
                 needs_update = _policy_needs_update(client, bucket_name, policy)
             except ClientError as exc:
@@ -98,6 +154,7 @@ class Command(BaseCommand):
                 raise
 
             if not needs_update:
+                _store_policy_fingerprint(client, bucket_name, tags, fingerprint)
                 self.stdout.write(self.style.SUCCESS("Bucket policy already up to date."))
                 return
 
@@ -113,6 +170,7 @@ class Command(BaseCommand):
                     )
                     return
                 raise
+            _store_policy_fingerprint(client, bucket_name, tags, fingerprint)
             self.stdout.write(self.style.SUCCESS("Applied public-read bucket policy."))
         elif set_policy:
             self.stdout.write(self.style.WARNING("Bucket policy bootstrap skipped: public read disabled."))
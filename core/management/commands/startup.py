@@ -5,7 +5,9 @@ Runs all pre-flight steps inside one Django process so the ~45s boot tax
 is paid exactly once instead of once per step.
 """
 import os
+import socket
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
@@ -22,46 +24,87 @@ class Command(BaseCommand):
         parser.add_argument("--no-theme-reconcile", action="store_true")
         parser.add_argument("--no-collectstatic", action="store_true")
         parser.add_argument("--no-db-wait", action="store_true")
+        parser.add_argument(
+            "--serial",
+            action="store_true",
+            help="Run storage bootstrap after migrations instead of alongside them.",
+        )
 
     def handle(self, *args, **options):
         if not options["no_db_wait"]:
             self._wait_for_db()
 
-        if not options["no_migrate"]:
-            self.stdout.write("Running migrations...")
-            call_command("migrate", "--noinput", verbosity=1, stdout=self.stdout, stderr=self.stderr)
+        run_migrate = not options["no_migrate"]
+        run_bootstrap = not options["no_bootstrap_storage"] and _env_enabled("STORAGE_BOOTSTRAP")
 
-        if not options["no_bootstrap_storage"]:
-            storage_bootstrap = os.getenv("STORAGE_BOOTSTRAP", "true").strip().lower()
-            if storage_bootstrap in ("1", "true", "yes", "on"):
-                self.stdout.write("Bootstrapping storage...")
-                call_command("bootstrap_storage", stdout=self.stdout, stderr=self.stderr)
+        # Migrations only touch the database and the storage bootstrap only talks to
+        # S3, so they can overlap. Theme reconcile and collectstatic need both.
+        if run_migrate and run_bootstrap and not options["serial"]:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                bootstrap = executor.submit(self._bootstrap_storage)
+                self._migrate()
+                bootstrap.result()
+        else:
+            if run_migrate:
+                self._migrate()
+            if run_bootstrap:
+                self._bootstrap_storage()
 
-        if not options["no_theme_reconcile"]:
-            theme_reconcile = os.getenv("THEME_RECONCILE", "true").strip().lower()
-            if theme_reconcile in ("1", "true", "yes", "on"):
-                self.stdout.write("Reconciling themes...")
-                call_command("theme_reconcile", stdout=self.stdout, stderr=self.stderr)
+        if not options["no_theme_reconcile"] and _env_enabled("THEME_RECONCILE"):
+            self.stdout.write("Reconciling themes...")
+            call_command("theme_reconcile", stdout=self.stdout, stderr=self.stderr)
 
-        if not options["no_collectstatic"]:
-            collectstatic = os.getenv("COLLECTSTATIC", "true").strip().lower()
-            if collectstatic in ("1", "true", "yes", "on"):
-                self.stdout.write("Collecting static files...")
-                call_command("collectstatic", "--noinput", verbosity=1, stdout=self.stdout, stderr=self.stderr)
+        if not options["no_collectstatic"] and _env_enabled("COLLECTSTATIC"):
+            self.stdout.write("Collecting static files...")
+            call_command("collectstatic", "--noinput", verbosity=1, stdout=self.stdout, stderr=self.stderr)
 
         self.stdout.write(self.style.SUCCESS("Startup complete."))
 
+    def _migrate(self):
+        self.stdout.write("Running migrations...")
+        call_command("migrate", "--noinput", verbosity=1, stdout=self.stdout, stderr=self.stderr)
+
+    def _bootstrap_storage(self):
+        self.stdout.write("Bootstrapping storage...")
+        call_command("bootstrap_storage", stdout=self.stdout, stderr=self.stderr)
+
     def _wait_for_db(self):
         timeout = int(os.getenv("DB_WAIT_TIMEOUT", "60"))
-        interval = float(os.getenv("DB_WAIT_INTERVAL", "2"))
+        max_interval = float(os.getenv("DB_WAIT_INTERVAL", "2"))
         self.stdout.write("Waiting for database...")
+        address = _db_address()
         start = time.monotonic()
+        delay = 0.05
         while True:
             try:
+                # A bare TCP connect is far cheaper than a full connection setup, so
+                # only attempt the real cursor once the server is accepting connections.
+                if address:
+                    socket.create_connection(address, timeout=0.5).close()
                 connections["default"].cursor().close()
                 return
-            except OperationalError as exc:
+            except (OSError, OperationalError) as exc:
                 elapsed = time.monotonic() - start
                 if elapsed >= timeout:
                     raise SystemExit(f"Database unavailable after {timeout}s: {exc}")
-                time.sleep(interval)
+                time.sleep(delay)
+                delay = min(delay * 2, max_interval)
+
+
+def _env_enabled(name):
+    return os.getenv(name, "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+_DEFAULT_DB_PORTS = {"postgresql": 5432, "mysql": 3306}
+
+
+def _db_address():
+    """Return ``(host, port)`` for a TCP database connection, or None."""
+    connection = connections["default"]
+    host = connection.settings_dict.get("HOST")
+    if not host or host.startswith("/"):
+        return None
+    port = connection.settings_dict.get("PORT") or _DEFAULT_DB_PORTS.get(connection.vendor)
+    if not port:
+        return None
+    return host, int(port)
@@ -5,6 +5,15 @@ from django.core.management.base import BaseCommand, CommandError
 
 from core.models import ThemeInstall
 
+TABLE_COLUMNS = (
+    ("SLUG", "slug"),
+    ("SOURCE", "source_type"),
+    ("REF", "source_ref"),
+    ("URL", "source_url"),
+    ("STATUS", "last_sync_status"),
+    ("LAST_SYNCED_AT", "last_synced_at"),
+)
+
 
 class Command(BaseCommand):
     help = "List installed themes and their source metadata."
@@ -17,61 +26,60 @@ class Command(BaseCommand):
         slug = options.get("slug")
         as_json = options.get("json", False)
 
-        installs = ThemeInstall.objects.all()
-        if slug:
-            if not installs.filter(slug=slug).exists():
-                raise CommandError(f"No installed theme found for slug '{slug}'.")
-            installs = installs.filter(slug=slug)
-
-        rows = [self._serialize_install(install) for install in installs.order_by("slug")]
+        installs = ThemeInstall.objects.filter(slug=slug) if slug else ThemeInstall.objects.all()
+        installs = installs.order_by("slug").values(
+            "slug",
+            "source_type",
+            "source_ref",
+            "source_url",
+            "last_sync_status",
+            "last_synced_at",
+            "version",
+        )
 
         if as_json:
-            self.stdout.write(json.dumps(rows))
+            self._write_json(installs, slug)
             return
 
+        rows = []
+        widths = [len(header) for header, _ in TABLE_COLUMNS]
+        for install in installs:
+            row = self._serialize_install(install)
+            rows.append(row)
+            widths = [max(width, len(row[key])) for width, (_, key) in zip(widths, TABLE_COLUMNS)]
+
+        if slug and not rows:
+            raise CommandError(f"No installed theme found for slug '{slug}'.")
+
         if not rows:
             self.stdout.write("No installed themes found.")
             return
 
-        headers = [
-            "SLUG",
-            "SOURCE",
-            "REF",
-            "URL",
-            "STATUS",
-            "LAST_SYNCED_AT",
-        ]
-        widths = {header: len(header) for header in headers}
+        format_str = "  ".join(f"{{{index}:<{width}}}" for index, width in enumerate(widths))
+        self.stdout.write(format_str.format(*(header for header, _ in TABLE_COLUMNS)))
         for row in rows:
-            widths["SLUG"] = max(widths["SLUG"], len(row["slug"]))
-            widths["SOURCE"] = max(widths["SOURCE"], len(row["source_type"]))
-            widths["REF"] = max(widths["REF"], len(row["source_ref"]))
-            widths["URL"] = max(widths["URL"], len(row["source_url"]))
-            widths["STATUS"] = max(widths["STATUS"], len(row["last_sync_status"]))
-            widths["LAST_SYNCED_AT"] = max(widths["LAST_SYNCED_AT"], len(row["last_synced_at"]))
+            self.stdout.write(format_str.format(*(row[key] for _, key in TABLE_COLUMNS)))
 
-        format_str = "  ".join(f"{{{header}:<{widths[header]}}}" for header in headers)
-        self.stdout.write(format_str.format(**{header: header for header in headers}))
-        for row in rows:
-            self.stdout.write(
-                format_str.format(
-                    SLUG=row["slug"],
-                    SOURCE=row["source_type"],
-                    REF=row["source_ref"],
-                    URL=row["source_url"],
-                    STATUS=row["last_sync_status"],
-                    LAST_SYNCED_AT=row["last_synced_at"],
-                )
-            )
+    def _write_json(self, installs, slug: str | None) -> None:
+        """Write the JSON array one row at a time instead of dumping a full list."""
+        separator = "["
+        for install in installs.iterator():
+            self.stdout.write(separator + json.dumps(self._serialize_install(install)), ending="")
+            separator = ", "
+        if separator == "[":
+            if slug:
+                raise CommandError(f"No installed theme found for slug '{slug}'.")
+            self.stdout.write("[", ending="")
+        self.stdout.write("]")
 
-    def _serialize_install(self, install: ThemeInstall) -> dict[str, Any]:
-        last_synced_at = install.last_synced_at.isoformat() if install.last_synced_at else ""
+    def _serialize_install(self, install: dict[str, Any]) -> dict[str, Any]:
+        last_synced_at = install["last_synced_at"]
         return {
-            "slug": install.slug,
-            "source_type": install.source_type,
-            "source_ref": install.source_ref or "",
-            "source_url": install.safe_source_url() or "",
-            "last_sync_status": install.last_sync_status or "",
-            "last_synced_at": last_synced_at,
-            "version": install.version or "",
+            "slug": install["slug"],
+            "source_type": install["source_type"],
+            "source_ref": install["source_ref"] or "",
+            "source_url": ThemeInstall.sanitize_source_url(install["source_url"]),
+            "last_sync_status": install["last_sync_status"] or "",
+            "last_synced_at": last_synced_at.isoformat() if last_synced_at else "",
+            "version": install["version"] or "",
         }
@@ -1,43 +1,113 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+
 from django.db import migrations, models
 
 
-BATCH_SIZE = 500
+BATCH_SIZE = int(os.environ.get("REQUEST_LOG_COPY_BATCH_SIZE", "2000"))
+
+LOG_FIELDS = (
+    "method",
+    "path",
+    "status_code",
+    "error",
+    "request_headers",
+    "request_query",
+    "request_body",
+    "response_body",
+    "remote_addr",
+    "user_agent",
+    "content_type",
+    "created_at",
+)
+
+
+def _batch_size(connection):
+    # Each copied row binds one parameter per field plus ``source``; keep a
+    # batch inside the backend's bind-parameter limit.
+    max_params = connection.features.max_query_params
+    if not max_params:
+        return max(BATCH_SIZE, 1)
+    return max(1, min(BATCH_SIZE, max_params // (len(LOG_FIELDS) + 1)))
 
 
-def _copy_logs(source_value, source_queryset, target_model):
+def _copy_logs(source_value, source_queryset, target_model, batch_size):
     batch = []
-    for log in source_queryset.iterator():
+    for log in source_queryset.only(*LOG_FIELDS).iterator(chunk_size=batch_size):
         batch.append(
             target_model(
                 source=source_value,
-                method=log.method,
-                path=log.path,
-                status_code=log.status_code,
-                error=log.error,
-                request_headers=log.request_headers,
-                request_query=log.request_query,
-                request_body=log.request_body,
-                response_body=log.response_body,
-                remote_addr=log.remote_addr,
-                user_agent=log.user_agent,
-                content_type=log.content_type,
-                created_at=log.created_at,
+                **{name: getattr(log, name) for name in LOG_FIELDS},
             )
         )
-        if len(batch) >= BATCH_SIZE:
-            target_model.objects.bulk_create(batch)
-            batch = []
+        if len(batch) >= batch_size:
+            target_model.objects.bulk_create(batch, batch_size=batch_size)
+            batch.clear()
     if batch:
-        target_model.objects.bulk_create(batch)
+        target_model.objects.bulk_create(batch, batch_size=batch_size)
+
+
+def _copy_row(source_value, row):
+    values = dict(zip(LOG_FIELDS, row))
+    values["request_headers"] = json.dumps(values["request_headers"])
+    values["request_query"] = json.dumps(values["request_query"])
+    return [source_value, *(values[name] for name in LOG_FIELDS)]
+
+
+def _csv_rows(source_value, rows) -> str:
+    """Format rows as COPY CSV input.
+
+    QUOTE_NOTNULL keeps empty strings distinct from NULL, which COPY reads as
+    an unquoted empty field.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NOTNULL)
+    writer.writerows(_copy_row(source_value, row) for row in rows)
+    return buffer.getvalue()
+
+
+def _copy_logs_postgresql(connection, source_value, source_queryset, target_model, batch_size):
+    """Load rows with COPY FROM STDIN instead of batched INSERTs.
+
+    Source rows are read a chunk at a time and each chunk is copied before the
+    next fetch, since the connection cannot stream a cursor while a COPY is open.
+    Both drivers are fed the same CSV text; psycopg 3's write_row() would emit
+    TEXT format instead.
+    """
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(name) for name in ("source", *LOG_FIELDS))
+    statement = f"COPY {quote(target_model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT CSV)"
+    rows = source_queryset.values_list(*LOG_FIELDS).iterator(chunk_size=batch_size)
+
+    while chunk := list(islice(rows, batch_size)):
+        data = _csv_rows(source_value, chunk)
+        with connection.cursor() as cursor:
+            raw_cursor = cursor.cursor
+            if hasattr(raw_cursor, "copy"):
+                # psycopg 3
+                with raw_cursor.copy(statement) as copy:
+                    copy.write(data)
+            else:
+                # psycopg2
+                raw_cursor.copy_expert(statement, io.StringIO(data))
 
 
 def forwards(apps, schema_editor):
     RequestErrorLog = apps.get_model("core", "RequestErrorLog")
     MicropubRequestLog = apps.get_model("micropub", "MicropubRequestLog")
     IndieAuthRequestLog = apps.get_model("indieauth", "IndieAuthRequestLog")
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        for source_value, model in (("micropub", MicropubRequestLog), ("indieauth", IndieAuthRequestLog)):
+            _copy_logs_postgresql(connection, source_value, model.objects.all(), RequestErrorLog, BATCH_SIZE)
+        return
 
-    _copy_logs("micropub", MicropubRequestLog.objects.all(), RequestErrorLog)
-    _copy_logs("indieauth", IndieAuthRequestLog.objects.all(), RequestErrorLog)
+    batch_size = _batch_size(connection)
+    _copy_logs("micropub", MicropubRequestLog.objects.all(), RequestErrorLog, batch_size)
+    _copy_logs("indieauth", IndieAuthRequestLog.objects.all(), RequestErrorLog, batch_size)
 
 
 def backwards(apps, schema_editor):
@@ -0,0 +1,30 @@
+import markdown
+from django.db import migrations, models
+
+
+def render_existing_notes(apps, schema_editor):
+    HCard = apps.get_model("core", "HCard")
+    for hcard in HCard.objects.exclude(note="").only("pk", "note"):
+        # Inlined rather than importing core.rendering, so later changes there
+        # can't alter what this migration does.
+        note_html = markdown.markdown(hcard.note, extensions=["fenced_code"])
+        HCard.objects.filter(pk=hcard.pk).update(note_html=note_html)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0042_siteconfiguration_microsub_unfollow_removes_entries"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="hcard",
+            name="note_html",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(render_existing_notes, noop_reverse),
+    ]
@@ -10,6 +10,8 @@ from django.contrib.contenttypes.fields import GenericRelation
 from solo.models import SingletonModel
 from files.models import Attachment, File
 
+from .rendering import render_markdown
+
 
 class Page(models.Model):
     title = models.CharField(max_length=512)
@@ -148,16 +150,21 @@ class ThemeInstall(models.Model):
         return self.slug
 
     def safe_source_url(self) -> str:
-        if not self.source_url:
+        return self.sanitize_source_url(self.source_url)
+
+    @staticmethod
+    def sanitize_source_url(source_url: str) -> str:
+        """Strip credentials, query and fragment from a source URL for display."""
+        if not source_url:
             return ""
         try:
             from urllib.parse import urlsplit, urlunsplit
         except ImportError:
-            return self.source_url
+            return source_url
         try:
-            parts = urlsplit(self.source_url)
+            parts = urlsplit(source_url)
         except ValueError:
-            return self.source_url
+            return source_url
         netloc = parts.netloc
         if "@" in netloc:
             netloc = netloc.split("@", 1)[1]
@@ -255,6 +262,23 @@ class SiteConfiguration(SingletonModel):
     def __str__(self):
         return "Site Configuration"
 
+    @classmethod
+    def for_request(cls, request):
+        """Return the singleton, loading it at most once per request.
+
+        The favicon and site author are joined in, since the context
+        processors read both (og:image, h-card) on every page.
+        """
+        settings_obj = getattr(request, "_site_config", None)
+        if settings_obj is None:
+            settings_obj = (
+                cls.objects.select_related("favicon", "site_author")
+                .filter(pk=cls.singleton_instance_id)
+                .first()
+            ) or cls.get_solo()
+            request._site_config = settings_obj
+        return settings_obj
+
     class Meta:
         verbose_name = "Site Configuration"
 
@@ -324,6 +348,7 @@ class HCard(models.Model):
     altitude = models.DecimalField(max_digits=9, decimal_places=2, null=True, blank=True)
 
     note = models.TextField(blank=True, default="")
+    note_html = models.TextField(blank=True, default="", editable=False)
     sex = models.CharField(max_length=64, blank=True, default="")
     gender_identity = models.CharField(max_length=255, blank=True, default="")
 
@@ -333,9 +358,27 @@ class HCard(models.Model):
     def __str__(self):
         return self.name or self.nickname or f"HCard {self.pk}"
 
+    def save(self, *args, **kwargs):
+        self.note_html = render_markdown(self.note) if self.note else ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "note" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "note_html"}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def photos_prefetch():
+        """Prefetch for ``photos`` that also loads each photo's file asset."""
+        return models.Prefetch(
+            "photos",
+            queryset=HCardPhoto.objects.select_related("asset").order_by("sort_order", "id"),
+        )
+
     @property
     def primary_photo(self):
-        return self.photos.order_by("sort_order", "id").first()
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("photos")
+        if prefetched is not None:
+            return min(prefetched, key=lambda photo: (photo.sort_order, photo.pk), default=None)
+        return self.photos.select_related("asset").order_by("sort_order", "id").first()
 
     @property
     def primary_photo_url(self):
@@ -1,45 +1,115 @@
+import logging
+import unicodedata
+from functools import lru_cache
+from operator import attrgetter
 from urllib.parse import urlsplit
 
-import markdown
-
 from django.templatetags.static import static
-from django.utils.html import strip_tags
+from django.utils.html import MLStripper, strip_tags
 from django.utils.text import Truncator
 
 from files.models import File
 
+from .rendering import render_markdown
+
+logger = logging.getLogger(__name__)
+
+_get_asset = attrgetter("asset")
+# Longer URLs are parsed uncached so user-supplied input can't bloat the cache.
+_MAX_CACHED_URL_LENGTH = 2048
+
+
+@lru_cache(maxsize=1024)
+def _is_absolute(url: str) -> bool:
+    parts = urlsplit(url)
+    return bool(parts.scheme and parts.netloc)
+
 
 def absolute_url(request, url: str) -> str:
     if not url:
         return ""
-    parts = urlsplit(url)
-    if parts.scheme and parts.netloc:
+    if len(url) <= _MAX_CACHED_URL_LENGTH:
+        is_absolute = _is_absolute(url)
+    else:
+        is_absolute = _is_absolute.__wrapped__(url)
+    if is_absolute:
         return url
     return request.build_absolute_uri(url)
 
 
+class _SummaryComplete(Exception):
+    pass
+
+
+class _SummaryStripper(MLStripper):
+    """strip_tags' parser, but stops once enough visible text has been collected."""
+
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit = limit
+        self.size = 0
+
+    def handle_data(self, d):
+        super().handle_data(d)
+        self.size += len(d)
+        if self.size > self.limit:
+            raise _SummaryComplete
+
+    def handle_entityref(self, name):
+        self.handle_data(f"&{name};")
+
+    def handle_charref(self, name):
+        self.handle_data(f"&#{name};")
+
+
 def summarize_markdown(content: str, length: int = 200) -> str:
     if not content:
         return ""
-    md = markdown.Markdown(extensions=["fenced_code"])
-    html = md.convert(content)
-    text = strip_tags(html).strip()
-    return Truncator(text).chars(length, truncate="...")
+    html = render_markdown(content)
+    # Only the first `length` visible characters survive, so stop parsing the
+    # HTML once comfortably past that instead of stripping the whole document.
+    stripper = _SummaryStripper(limit=length * 2)
+    try:
+        stripper.feed(html)
+        stripper.close()
+    except _SummaryComplete:
+        prefix = stripper.get_data().strip()
+        summary = Truncator(prefix).chars(length, truncate="...")
+        truncated = summary != unicodedata.normalize("NFC", prefix)
+        if truncated and not ("<" in prefix and ">" in prefix):
+            return summary
+        text = strip_tags(html)
+    else:
+        text = stripper.get_data()
+        if "<" in text and ">" in text:
+            text = strip_tags(text)
+    return Truncator(text.strip()).chars(length, truncate="...")
 
 
 def first_attachment_image_url(attachments) -> tuple[str, str]:
-    if not attachments:
-        return "", ""
-    for attachment in attachments:
-        asset = getattr(attachment, "asset", None)
-        if asset and asset.kind == File.IMAGE and asset.file:
-            return asset.file.url, asset.alt_text or ""
-    return "", ""
+    """Return (url, alt) for the first image attachment.
+
+    Callers should pass attachments with ``asset`` already loaded
+    (``select_related``/``prefetch_related("attachments__asset")``).
+    """
+    images = (
+        (asset.file.url, asset.alt_text or "")
+        for asset in map(_get_asset, attachments or ())
+        if asset and asset.kind == File.IMAGE and asset.file
+    )
+    return next(images, ("", ""))
 
 
 def default_image_url(request, *, settings=None, site_author_hcard=None) -> str:
+    """Return the fallback og:image URL.
+
+    ``settings`` should come from ``SiteConfiguration.for_request`` so the
+    favicon is already joined; otherwise reading it costs an extra query.
+    """
     if site_author_hcard and site_author_hcard.primary_photo_url:
         return absolute_url(request, site_author_hcard.primary_photo_url)
+    if settings and settings.favicon_id and not type(settings).favicon.is_cached(settings):
+        logger.debug("default_image_url: favicon was not select_related; loading it separately")
     if settings and settings.favicon_id and settings.favicon and settings.favicon.file:
         return absolute_url(request, settings.favicon.file.url)
     return absolute_url(request, static("favicon.svg"))
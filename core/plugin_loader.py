@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import importlib.util
 import json
 import logging
+import os
+import re
 import shutil
 import subprocess
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 from urllib.parse import urlsplit
@@ -15,7 +19,13 @@ logger = logging.getLogger(__name__)
 
 PLUGIN_META_FILENAME = "plugin.json"
 PLUGINS_DIRNAME = "plugins"
+GIT_MISSING_MESSAGE = (
+    "Git is required to install plugins from git. Ensure the 'git' executable is available in PATH."
+)
 _DEFAULT_BASE_DIR = Path(__file__).resolve().parent.parent
+_GIT_EXECUTABLE: Optional[str] = None
+# Abbreviated or full commit SHA; --branch can never resolve these.
+_COMMIT_SHA_RE = re.compile(r"[0-9a-fA-F]{7,40}")
 
 
 class PluginInstallError(Exception):
@@ -48,28 +58,54 @@ def get_plugins_root(base_dir: Optional[Path] = None) -> Path:
         return _DEFAULT_BASE_DIR / PLUGINS_DIRNAME
 
 
+@lru_cache(maxsize=8)
+def _list_plugin_dirs(plugins_root: str, root_mtime_ns: int) -> tuple[tuple[str, str], ...]:
+    """Return (dir name, plugin.json path) for each child directory; keyed on the root's mtime."""
+    with os.scandir(plugins_root) as entries:
+        return tuple(
+            (entry.name, os.path.join(entry.path, PLUGIN_META_FILENAME))
+            for entry in entries
+            if entry.is_dir()
+        )
+
+
+@lru_cache(maxsize=256)
+def _load_plugin_metadata(meta_path: str, signature: tuple[int, int]) -> Optional[dict]:
+    """Parse plugin.json; keyed on (mtime_ns, size) so edits are picked up."""
+    try:
+        with open(meta_path, "rb") as handle:
+            return json.loads(handle.read())
+    except Exception as exc:
+        logger.warning("Could not parse plugin.json in %s: %s", os.path.dirname(meta_path), exc)
+        return None
+
+
+def clear_plugin_cache() -> None:
+    _list_plugin_dirs.cache_clear()
+    _load_plugin_metadata.cache_clear()
+
+
 def discover_plugins(base_dir: Optional[Path] = None) -> list[PluginDefinition]:
     """Scan PLUGINS_ROOT for plugin.json files and return discovered plugins."""
     plugins_root = get_plugins_root(base_dir)
-    if not plugins_root.exists():
+    try:
+        root_stat = plugins_root.stat()
+    except OSError:
         return []
 
     plugins: list[PluginDefinition] = []
-    for plugin_dir in plugins_root.iterdir():
-        if not plugin_dir.is_dir():
-            continue
-
-        meta_path = plugin_dir / PLUGIN_META_FILENAME
-        if not meta_path.exists():
+    for dir_name, meta_path in _list_plugin_dirs(str(plugins_root), root_stat.st_mtime_ns):
+        try:
+            meta_stat = os.stat(meta_path)
+        except OSError:
             continue
 
-        try:
-            metadata = json.loads(meta_path.read_text())
-        except Exception as exc:
-            logger.warning("Could not parse plugin.json in %s: %s", plugin_dir, exc)
+        metadata = _load_plugin_metadata(meta_path, (meta_stat.st_mtime_ns, meta_stat.st_size))
+        if metadata is None:
             continue
 
-        name = metadata.get("name") or plugin_dir.name
+        plugin_dir = plugins_root / dir_name
+        name = metadata.get("name") or dir_name
         label = metadata.get("label") or name.replace("-", " ").title()
         plugins.append(
             PluginDefinition(
@@ -124,47 +160,23 @@ def _ensure_git_url_allowed(url: str) -> None:
         )
 
 
-def _run_git(command: list[str], *, error_message: str) -> None:
-    if shutil.which(command[0]) is None:
-        raise PluginInstallError(
-            "Git is required to install plugins from git. Ensure the 'git' executable is available in PATH."
-        )
-    try:
-        subprocess.run(
-            command,
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-    except FileNotFoundError as exc:
-        raise PluginInstallError(
-            "Git is required to install plugins from git. Ensure the 'git' executable is available in PATH."
-        ) from exc
-    except subprocess.CalledProcessError as exc:
-        detail = (exc.stderr or exc.stdout or "").strip()
-        if detail:
-            raise PluginInstallError(f"{error_message}: {detail}") from exc
-        raise PluginInstallError(error_message) from exc
+def _git_executable() -> Optional[str]:
+    """Resolve git on PATH once; misses are not remembered so a later install is picked up."""
+    global _GIT_EXECUTABLE
+    if _GIT_EXECUTABLE is None:
+        _GIT_EXECUTABLE = shutil.which("git")
+    return _GIT_EXECUTABLE
 
 
-def _run_git_capture(command: list[str], *, error_message: str) -> str:
-    if shutil.which(command[0]) is None:
-        raise PluginInstallError(
-            "Git is required to install plugins from git. Ensure the 'git' executable is available in PATH."
-        )
+def _run_git(command: list[str], *, error_message: str) -> str:
+    """Run a git command, returning its stripped stdout or raising PluginInstallError."""
+    git = _git_executable()
+    if git is None:
+        raise PluginInstallError(GIT_MISSING_MESSAGE)
     try:
-        result = subprocess.run(
-            command,
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+        result = subprocess.run([git, *command[1:]], check=True, capture_output=True, text=True)
     except FileNotFoundError as exc:
-        raise PluginInstallError(
-            "Git is required to install plugins from git. Ensure the 'git' executable is available in PATH."
-        ) from exc
+        raise PluginInstallError(GIT_MISSING_MESSAGE) from exc
     except subprocess.CalledProcessError as exc:
         detail = (exc.stderr or exc.stdout or "").strip()
         if detail:
@@ -182,12 +194,17 @@ def _write_installed_plugins_file(django_apps: list[str]) -> None:
         base_dir = _DEFAULT_BASE_DIR
 
     installed_plugins_path = base_dir / "config" / "installed_plugins.py"
-    lines = ["# Auto-generated by webstead plugin manager. Do not edit manually.\n"]
-    lines.append("INSTALLED_PLUGIN_APPS = [\n")
-    for app in django_apps:
-        lines.append(f'    "{app}",\n')
-    lines.append("]\n")
-    installed_plugins_path.write_text("".join(lines))
+    body = (
+        "# Auto-generated by webstead plugin manager. Do not edit manually.\n"
+        "INSTALLED_PLUGIN_APPS = [\n"
+        + "".join(f'    "{app}",\n' for app in django_apps)
+        + "]\n"
+    )
+    # Write a sibling temp file and swap it in, so a reload triggered by
+    # _touch_wsgi never imports a half-written module.
+    tmp_path = installed_plugins_path.with_suffix(".py.tmp")
+    tmp_path.write_bytes(body.encode())
+    os.replace(tmp_path, installed_plugins_path)
 
 
 def _get_installed_plugin_apps() -> list[str]:
@@ -214,6 +231,29 @@ def _touch_wsgi() -> None:
         logger.warning("Could not touch wsgi.py to trigger reload: %s", exc)
 
 
+def _migrate_plugin_app(django_app: str) -> None:
+    """Migrate only the plugin's app when this process has it loaded.
+
+    A freshly installed app is not in INSTALLED_APPS until the server reloads,
+    and apps without migrations need --run-syncdb, which can't be scoped to a
+    label; both fall back to a full migrate.
+    """
+    from django.apps import apps
+    from django.core.management import call_command
+    from django.db.migrations.loader import MigrationLoader
+
+    app_label = next(
+        (config.label for config in apps.get_app_configs() if config.name == django_app),
+        None,
+    )
+    if app_label is not None:
+        module_name, _ = MigrationLoader.migrations_module(app_label)
+        if module_name and importlib.util.find_spec(module_name) is not None:
+            call_command("migrate", app_label, verbosity=0)
+            return
+    call_command("migrate", "--run-syncdb", verbosity=0)
+
+
 def install_plugin_from_git(
     git_url: str,
     slug: str,
@@ -233,47 +273,45 @@ def install_plugin_from_git(
     plugins_root.mkdir(parents=True, exist_ok=True)
     install_dir = plugins_root / slug
 
+    previous_commit = ""
     if install_dir.exists():
+        if (install_dir / ".git").is_dir():
+            try:
+                previous_commit = _head_commit(install_dir)
+            except PluginInstallError:
+                pass
         shutil.rmtree(install_dir)
 
-    _run_git(
-        ["git", "clone", "--depth", "1", git_url, str(install_dir)],
-        error_message="Unable to clone plugin repository",
-    )
-    if ref:
-        _run_git(
-            ["git", "-C", str(install_dir), "fetch", "--depth", "1", "origin", ref],
-            error_message=f"Unable to fetch ref '{ref}'",
-        )
-        _run_git(
-            ["git", "-C", str(install_dir), "checkout", ref],
-            error_message=f"Unable to checkout ref '{ref}'",
-        )
-
-    commit = _run_git_capture(
-        ["git", "-C", str(install_dir), "rev-parse", "HEAD"],
-        error_message="Unable to determine plugin commit",
-    )
-
-    meta_path = install_dir / PLUGIN_META_FILENAME
-    if not meta_path.exists():
-        shutil.rmtree(install_dir, ignore_errors=True)
-        raise PluginInstallError(f"Repository does not contain a {PLUGIN_META_FILENAME} file.")
+    # Partial, sparse clone: only top-level files (including plugin.json) are
+    # checked out, so a repository without valid metadata is rejected before
+    # the rest of its blobs are downloaded.
+    _clone_at_ref(git_url, install_dir, ref, clone_args=("--filter=blob:none", "--sparse"))
+    commit = _head_commit(install_dir)
 
     try:
-        metadata = json.loads(meta_path.read_text())
-    except Exception as exc:
+        metadata = _read_checkout_metadata(install_dir)
+    except PluginInstallError:
         shutil.rmtree(install_dir, ignore_errors=True)
-        raise PluginInstallError(f"Could not parse {PLUGIN_META_FILENAME}: {exc}") from exc
+        raise
 
     django_app = metadata.get("django_app", "")
     if not django_app:
         shutil.rmtree(install_dir, ignore_errors=True)
         raise PluginInstallError(f"{PLUGIN_META_FILENAME} must specify a 'django_app' field.")
 
+    try:
+        _run_git(
+            ["git", "-C", str(install_dir), "sparse-checkout", "disable"],
+            error_message="Unable to check out plugin files",
+        )
+    except PluginInstallError:
+        shutil.rmtree(install_dir, ignore_errors=True)
+        raise
+
     # Update installed_plugins.py
     current_apps = _get_installed_plugin_apps()
-    if django_app not in current_apps:
+    apps_changed = django_app not in current_apps
+    if apps_changed:
         current_apps.append(django_app)
         _write_installed_plugins_file(current_apps)
 
@@ -281,32 +319,40 @@ def install_plugin_from_git(
     try:
         from core.models import PluginInstall
 
-        PluginInstall.objects.update_or_create(
-            name=slug,
-            defaults={
-                "django_app": django_app,
-                "label": metadata.get("label", slug),
-                "source_type": PluginInstall.SOURCE_GIT,
-                "source_url": git_url,
-                "source_ref": ref or "",
-                "version": metadata.get("version", ""),
-                "last_synced_commit": commit,
-                "last_synced_at": timezone.now(),
-                "last_sync_status": PluginInstall.STATUS_SUCCESS,
-                "last_sync_error": "",
-            },
+        record = {
+            "django_app": django_app,
+            "label": metadata.get("label", slug),
+            "source_type": PluginInstall.SOURCE_GIT,
+            "source_url": git_url,
+            "source_ref": ref or "",
+            "version": metadata.get("version", ""),
+            "last_synced_commit": commit,
+            "last_synced_at": timezone.now(),
+            "last_sync_status": PluginInstall.STATUS_SUCCESS,
+            "last_sync_error": "",
+        }
+        # One INSERT ... ON CONFLICT (name) DO UPDATE instead of SELECT + write;
+        # installed_at is left out of the update so reinstalls keep it.
+        PluginInstall.objects.bulk_create(
+            [PluginInstall(name=slug, **record)],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=list(record),
         )
     except Exception:
         logger.warning("Unable to persist plugin install record for %s", slug, exc_info=True)
 
     # Run migrations for the new app
     try:
-        from django.core.management import call_command
-        call_command("migrate", "--run-syncdb", verbosity=0)
+        _migrate_plugin_app(django_app)
     except Exception as exc:
         logger.warning("Could not run migrations after installing plugin %s: %s", slug, exc)
 
-    _touch_wsgi()
+    clear_plugin_cache()
+    # Reinstalling the same commit of an already-registered app changes no
+    # code, so skip the server reload.
+    if apps_changed or commit != previous_commit:
+        _touch_wsgi()
 
     return PluginDefinition(
         name=metadata.get("name", slug),
@@ -319,6 +365,110 @@ def install_plugin_from_git(
     )
 
 
+def _clone_at_ref(git_url: str, install_dir: Path, ref: str, *, clone_args: tuple[str, ...] = ()) -> None:
+    """Shallow-clone git_url into install_dir, checked out at ref when one is given.
+
+    Branch and tag refs are cloned directly with --branch (one git process).
+    Commit SHAs, and refs --branch rejects, clone the default branch and then
+    fetch and check out the ref.
+    """
+    clone = ["git", "clone", "--depth", "1", *clone_args]
+    if ref and not _COMMIT_SHA_RE.fullmatch(ref):
+        try:
+            _run_git(
+                [*clone, "--branch", ref, git_url, str(install_dir)],
+                error_message="Unable to clone plugin repository",
+            )
+            return
+        except PluginInstallError:
+            shutil.rmtree(install_dir, ignore_errors=True)
+
+    _run_git(
+        [*clone, git_url, str(install_dir)],
+        error_message="Unable to clone plugin repository",
+    )
+    if ref:
+        _run_git(
+            ["git", "-C", str(install_dir), "fetch", "--depth", "1", "origin", ref],
+            error_message=f"Unable to fetch ref '{ref}'",
+        )
+        _run_git(
+            ["git", "-C", str(install_dir), "checkout", "FETCH_HEAD"],
+            error_message=f"Unable to checkout ref '{ref}'",
+        )
+
+
+def _head_commit(repo_dir: Path) -> str:
+    """Read the checked-out commit from .git without spawning git when possible."""
+    git_dir = repo_dir / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref_name = head[len("ref: "):]
+        ref_path = git_dir / ref_name
+        if ref_path.is_file():
+            return ref_path.read_text().strip()
+        for line in (git_dir / "packed-refs").read_text().splitlines():
+            commit, _, name = line.partition(" ")
+            if name == ref_name:
+                return commit
+    except OSError:
+        pass
+    return _run_git(
+        ["git", "-C", str(repo_dir), "rev-parse", "HEAD"],
+        error_message="Unable to determine plugin commit",
+    )
+
+
+def _read_checkout_metadata(install_dir: Path) -> dict:
+    """Parse plugin.json from a fresh checkout with a single open (no exists() stat)."""
+    try:
+        with open(install_dir / PLUGIN_META_FILENAME, "rb") as handle:
+            data = handle.read()
+    except FileNotFoundError as exc:
+        raise PluginInstallError(f"Repository does not contain a {PLUGIN_META_FILENAME} file.") from exc
+    except OSError as exc:
+        raise PluginInstallError(f"Could not read {PLUGIN_META_FILENAME}: {exc}") from exc
+    try:
+        return json.loads(data)
+    except Exception as exc:
+        raise PluginInstallError(f"Could not parse {PLUGIN_META_FILENAME}: {exc}") from exc
+
+
+def _update_checkout_in_place(install_dir: Path, source_url: str, ref: str) -> bool:
+    """Update an existing clone in place with fetch + reset.
+
+    Returns False when the directory is not a usable clone of source_url (or the
+    fetch fails), in which case the caller falls back to a fresh clone.
+    """
+    if not (install_dir / ".git").is_dir():
+        return False
+    try:
+        _run_git(
+            ["git", "-C", str(install_dir), "rev-parse", "--git-dir"],
+            error_message="Plugin checkout is not a git repository",
+        )
+        remote_url = _run_git(
+            ["git", "-C", str(install_dir), "config", "--get", "remote.origin.url"],
+            error_message="Plugin checkout has no origin remote",
+        )
+        if remote_url != source_url:
+            return False
+        _run_git(
+            ["git", "-C", str(install_dir), "fetch", "--depth", "1", "origin", ref or "HEAD"],
+            error_message=f"Unable to fetch ref '{ref or 'HEAD'}'",
+        )
+        _run_git(
+            ["git", "-C", str(install_dir), "reset", "--hard", "FETCH_HEAD"],
+            error_message="Unable to reset plugin checkout",
+        )
+    except PluginInstallError as exc:
+        logger.warning("Re-cloning plugin at %s: %s", install_dir, exc)
+        return False
+    return True
+
+
 def update_plugin_from_git(
     install,
     *,
@@ -337,36 +487,13 @@ def update_plugin_from_git(
     plugins_root = get_plugins_root(base_dir)
     install_dir = plugins_root / install.name
 
-    if install_dir.exists():
-        shutil.rmtree(install_dir)
+    if not _update_checkout_in_place(install_dir, install.source_url, ref_value):
+        if install_dir.exists():
+            shutil.rmtree(install_dir)
+        _clone_at_ref(install.source_url, install_dir, ref_value)
+    commit = _head_commit(install_dir)
 
-    _run_git(
-        ["git", "clone", "--depth", "1", install.source_url, str(install_dir)],
-        error_message="Unable to clone plugin repository",
-    )
-    if ref_value:
-        _run_git(
-            ["git", "-C", str(install_dir), "fetch", "--depth", "1", "origin", ref_value],
-            error_message=f"Unable to fetch ref '{ref_value}'",
-        )
-        _run_git(
-            ["git", "-C", str(install_dir), "checkout", ref_value],
-            error_message=f"Unable to checkout ref '{ref_value}'",
-        )
-
-    commit = _run_git_capture(
-        ["git", "-C", str(install_dir), "rev-parse", "HEAD"],
-        error_message="Unable to determine plugin commit",
-    )
-
-    meta_path = install_dir / PLUGIN_META_FILENAME
-    if not meta_path.exists():
-        raise PluginInstallError(f"Repository does not contain a {PLUGIN_META_FILENAME} file.")
-
-    try:
-        metadata = json.loads(meta_path.read_text())
-    except Exception as exc:
-        raise PluginInstallError(f"Could not parse {PLUGIN_META_FILENAME}: {exc}") from exc
+    metadata = _read_checkout_metadata(install_dir)
 
     update_fields = [
         "version",
@@ -375,6 +502,7 @@ def update_plugin_from_git(
         "last_sync_status",
         "last_sync_error",
     ]
+    previous_commit = install.last_synced_commit
     install.version = metadata.get("version", "")
     install.last_synced_commit = commit
     install.last_synced_at = timezone.now()
@@ -386,12 +514,13 @@ def update_plugin_from_git(
     install.save(update_fields=update_fields)
 
     try:
-        from django.core.management import call_command
-        call_command("migrate", "--run-syncdb", verbosity=0)
+        _migrate_plugin_app(metadata.get("django_app") or install.django_app)
     except Exception as exc:
         logger.warning("Could not run migrations after updating plugin %s: %s", install.name, exc)
 
-    _touch_wsgi()
+    clear_plugin_cache()
+    if commit != previous_commit:
+        _touch_wsgi()
 
     return PluginDefinition(
         name=metadata.get("name", install.name),
@@ -431,4 +560,5 @@ def remove_plugin(name: str, base_dir: Optional[Path] = None) -> None:
     if install_dir.exists():
         shutil.rmtree(install_dir, ignore_errors=True)
 
+    clear_plugin_cache()
     _touch_wsgi()
@@ -32,9 +32,16 @@ class BasePlugin:
 class PluginRegistry:
     def __init__(self):
         self._plugins: dict[str, BasePlugin] = {}
+        # Widget lookups are rebuilt lazily whenever a plugin is registered.
+        self._version = 0
+        self._widget_cache_version = -1
+        self._widget_types: list[type[BaseWidget]] = []
+        self._widget_type_by_slug: dict[str, type[BaseWidget]] = {}
+        self._widget_choices: list[tuple[str, str]] = []
 
     def register(self, plugin: BasePlugin) -> None:
         self._plugins[plugin.name] = plugin
+        self._version += 1
 
     def all_plugins(self) -> list[BasePlugin]:
         return list(self._plugins.values())
@@ -42,20 +49,31 @@ class PluginRegistry:
     def get_plugin(self, name: str) -> BasePlugin | None:
         return self._plugins.get(name)
 
-    def get_all_widget_types(self) -> list[type[BaseWidget]]:
+    def _refresh_widget_cache(self) -> None:
+        if self._widget_cache_version == self._version:
+            return
         types = []
         for plugin in self._plugins.values():
             types.extend(plugin.get_widget_types())
-        return types
+        by_slug = {}
+        for cls in types:
+            by_slug.setdefault(cls.slug, cls)
+        self._widget_types = types
+        self._widget_type_by_slug = by_slug
+        self._widget_choices = [(cls.slug, cls.label) for cls in types]
+        self._widget_cache_version = self._version
+
+    def get_all_widget_types(self) -> list[type[BaseWidget]]:
+        self._refresh_widget_cache()
+        return list(self._widget_types)
 
     def get_widget_type(self, slug: str) -> type[BaseWidget] | None:
-        for cls in self.get_all_widget_types():
-            if cls.slug == slug:
-                return cls
-        return None
+        self._refresh_widget_cache()
+        return self._widget_type_by_slug.get(slug)
 
     def widget_choices(self) -> list[tuple[str, str]]:
-        return [(cls.slug, cls.label) for cls in self.get_all_widget_types()]
+        self._refresh_widget_cache()
+        return list(self._widget_choices)
 
     def get_admin_nav_items(self) -> list[dict]:
         items = []
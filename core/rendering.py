@@ -0,0 +1,31 @@
+import re
+import threading
+from functools import lru_cache
+
+import markdown
+
+_local = threading.local()
+
+# Anything that could change how markdown renders a single line: inline and
+# block syntax, raw HTML/entities, autolinks, line breaks and edge whitespace.
+_MARKDOWN_SIGNIFICANT_RE = re.compile(r"[`_*#\[\]>\-!<&=+|~\\:\r\n\t]|^\s|\s$|^\d+\.")
+
+
+def _get_md():
+    # Markdown instances are stateful, so keep one per thread and reset it per use.
+    md = getattr(_local, "md", None)
+    if md is None:
+        md = markdown.Markdown(extensions=["fenced_code"])
+        _local.md = md
+    return md
+
+
+@lru_cache(maxsize=32)
+def render_markdown(text):
+    """Render markdown to HTML, reusing a per-thread parser."""
+    if not text:
+        return ""
+    if not _MARKDOWN_SIGNIFICANT_RE.search(text):
+        # Plain single-line text renders as one paragraph; skip the parser.
+        return f"<p>{text}</p>"
+    return _get_md().reset().convert(text)
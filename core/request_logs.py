@@ -1,12 +1,19 @@
 import json
+from functools import lru_cache
 from urllib.parse import parse_qs
 
 from django.http import RawPostDataException
 
 from core.models import RequestErrorLog
 
-DEFAULT_REDACT_HEADERS = {"authorization", "cookie"}
+DEFAULT_REDACT_HEADERS = frozenset({"authorization", "cookie"})
 MAX_LOG_BODY_CHARS = 10000
+_MISSING = object()
+_UNPARSEABLE = object()
+
+
+def _json_dumps(value) -> str:
+    return json.dumps(value, indent=2, sort_keys=True, ensure_ascii=False)
 
 
 def _redact_secret(value: str) -> str:
@@ -17,6 +24,15 @@ def _redact_secret(value: str) -> str:
     return f"{value[:6]}...{value[-4:]}"
 
 
+def _redact_secret_batch(values: list[str]) -> list[str]:
+    return [_redact_secret(value) for value in values]
+
+
+def _is_string_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+@lru_cache(maxsize=1024)
 def _normalized_key(key: str) -> str:
     normalized = key.lower()
     if normalized.endswith("[]"):
@@ -24,34 +40,90 @@ def _normalized_key(key: str) -> str:
     return normalized
 
 
+@lru_cache(maxsize=32)
+def _lowered_frozenset(names: frozenset[str]) -> frozenset[str]:
+    return frozenset(name.lower() for name in names)
+
+
+def _lowered(names) -> frozenset[str]:
+    """Lower-case a set of field/header names; frozenset constants are cached."""
+    if not names:
+        return frozenset()
+    if isinstance(names, frozenset):
+        return _lowered_frozenset(names)
+    return frozenset(name.lower() for name in names)
+
+
+def _redact_children(node, sensitive: bool, redact_fields: set[str]):
+    """Yield (key, child, sensitive) for a dict or list node.
+
+    Under a sensitive dict key, string values (and strings directly inside a
+    list value) are redacted; nested containers go back to normal handling.
+    """
+    if isinstance(node, dict):
+        for key, item in node.items():
+            yield key, item, _normalized_key(str(key)) in redact_fields
+    else:
+        for index, item in enumerate(node):
+            yield index, item, sensitive and isinstance(item, str)
+
+
 def _redact_payload(value, redact_fields: set[str]):
-    if isinstance(value, dict):
-        redacted = {}
-        for key, item in value.items():
-            key_name = _normalized_key(str(key))
-            if key_name in redact_fields:
-                redacted[key] = _redact_sensitive(item, redact_fields)
+    """Return value with sensitive fields redacted at any depth.
+
+    Walks the tree with an explicit stack and copies only containers that have
+    something redacted below them; untouched subtrees are returned as-is.
+    """
+    if not isinstance(value, (dict, list)):
+        return value
+    # Frame: [node, children iterator, (key, result) pairs, changed, key in parent]
+    stack = [[value, _redact_children(value, False, redact_fields), [], False, None]]
+    while True:
+        frame = stack[-1]
+        node, children, results = frame[0], frame[1], frame[2]
+        for key, child, sensitive in children:
+            if _is_string_list(child):
+                # Form and multipart fields are flat lists of strings; handle
+                # them in one pass instead of pushing a frame per field.
+                if sensitive and any(child):
+                    child = _redact_secret_batch(child)
+                    frame[3] = True
+                results.append((key, child))
+                continue
+            if isinstance(child, (dict, list)):
+                stack.append([child, _redact_children(child, sensitive, redact_fields), [], False, key])
+                break
+            result = _redact_secret(child) if sensitive and isinstance(child, str) else child
+            if result is not child:
+                frame[3] = True
+            results.append((key, result))
+        else:
+            stack.pop()
+            if frame[3]:
+                result = dict(results) if isinstance(node, dict) else [item for _, item in results]
             else:
-                redacted[key] = _redact_payload(item, redact_fields)
-        return redacted
-    if isinstance(value, list):
-        return [_redact_payload(item, redact_fields) for item in value]
-    return value
-
-
-def _redact_sensitive(value, redact_fields: set[str]):
-    if isinstance(value, str):
-        return _redact_secret(value)
-    if isinstance(value, list):
-        return [
-            _redact_secret(item)
-            if isinstance(item, str)
-            else _redact_payload(item, redact_fields)
-            for item in value
-        ]
-    if isinstance(value, dict):
-        return _redact_payload(value, redact_fields)
-    return value
+                result = node
+            if not stack:
+                return result
+            parent = stack[-1]
+            if result is not node:
+                parent[3] = True
+            parent[2].append((frame[4], result))
+
+
+def _may_contain_fields(body_bytes: bytes, redact_fields: set[str]) -> bool:
+    """Cheap pre-check: can any redact field appear as a key in this JSON body?
+
+    Non-ASCII bodies and bodies using \\u escapes are always parsed, since a
+    key that only matches after unescaping or str.lower() would be missed by a
+    plain substring search.
+    """
+    if not redact_fields:
+        return False
+    if b"\\u" in body_bytes or not body_bytes.isascii():
+        return True
+    lowered = body_bytes.lower()
+    return any(field.encode() in lowered for field in redact_fields)
 
 
 def _truncate_body(body: str) -> str:
@@ -60,12 +132,53 @@ def _truncate_body(body: str) -> str:
     return f"{body[:MAX_LOG_BODY_CHARS]}\n...(truncated)"
 
 
-def capture_request_body(request, *, redact_fields: set[str] | None = None) -> str:
-    redact_fields = {field.lower() for field in (redact_fields or set())}
-    content_type = request.content_type or ""
+def _parsed_json_body(request, body_bytes: bytes):
+    """Parse the JSON request body once per request; _UNPARSEABLE if invalid.
+
+    The parsed value is shared between callers, so it must not be mutated.
+    """
+    parsed = getattr(request, "_parsed_body_cache", _MISSING)
+    if parsed is _MISSING:
+        try:
+            parsed = json.loads(body_bytes)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            parsed = _UNPARSEABLE
+        request._parsed_body_cache = parsed
+    return parsed
+
+
+def _headers_snapshot(request) -> dict:
+    """Copy request.headers once per request."""
+    headers = getattr(request, "_headers_snapshot", None)
+    if headers is None:
+        headers = dict(request.headers)
+        request._headers_snapshot = headers
+    return headers
 
+
+def _content_kind(content_type: str) -> str:
     if content_type.startswith("multipart/"):
-        fields = {key: request.POST.getlist(key) for key in request.POST.keys()}
+        return "multipart"
+    if "application/json" in content_type:
+        return "json"
+    if "application/x-www-form-urlencoded" in content_type:
+        return "form"
+    return "other"
+
+
+def _content_length(request) -> int:
+    try:
+        return int(request.META.get("CONTENT_LENGTH") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def capture_request_body(request, *, redact_fields: set[str] | frozenset[str] | None = None) -> str:
+    redact_fields = _lowered(redact_fields)
+    ct_kind = _content_kind(request.content_type or "")
+
+    if ct_kind == "multipart":
+        fields = dict(request.POST.lists())
         files = {}
         for key, items in request.FILES.lists():
             files[key] = [
@@ -77,49 +190,52 @@ def capture_request_body(request, *, redact_fields: set[str] | None = None) -> s
                 for item in items
             ]
         payload = {"fields": _redact_payload(fields, redact_fields), "files": files}
-        return json.dumps(payload, indent=2, sort_keys=True)
+        return _json_dumps(payload)
+
+    content_length = _content_length(request)
+    if content_length > MAX_LOG_BODY_CHARS * 4:
+        # Far more than would be kept after truncation; don't read or decode it.
+        return f"(body {content_length} bytes; not captured)"
 
     try:
         body_bytes = request.body or b""
     except RawPostDataException:
-        if "application/x-www-form-urlencoded" in content_type:
-            parsed = {key: values for key, values in request.POST.lists()}
-            return _truncate_body(
-                json.dumps(_redact_payload(parsed, redact_fields), indent=2, sort_keys=True)
-            )
-        return ""
+        body_bytes = None
 
     if not body_bytes:
-        if "application/x-www-form-urlencoded" in content_type and request.POST:
-            parsed = {key: values for key, values in request.POST.lists()}
+        # The body was already consumed (or is empty); Django may still have
+        # parsed form data into request.POST.
+        if ct_kind == "form" and (body_bytes is None or request.POST):
+            parsed = dict(request.POST.lists())
             return _truncate_body(
-                json.dumps(_redact_payload(parsed, redact_fields), indent=2, sort_keys=True)
+                _json_dumps(_redact_payload(parsed, redact_fields))
             )
         return ""
 
-    body_text = body_bytes.decode("utf-8", errors="replace")
+    if ct_kind == "json":
+        if not _may_contain_fields(body_bytes, redact_fields):
+            # Nothing to redact: log the body as sent instead of parsing it
+            # just to pretty-print.
+            return _truncate_body(body_bytes.decode("utf-8", errors="replace"))
+        parsed = _parsed_json_body(request, body_bytes)
+        if parsed is _UNPARSEABLE:
+            return _truncate_body(body_bytes.decode("utf-8", errors="replace"))
+        return _truncate_body(_json_dumps(_redact_payload(parsed, redact_fields)))
 
-    if "application/json" in content_type:
-        try:
-            parsed = json.loads(body_text)
-        except json.JSONDecodeError:
-            return _truncate_body(body_text)
-        return _truncate_body(
-            json.dumps(_redact_payload(parsed, redact_fields), indent=2, sort_keys=True)
-        )
+    body_text = body_bytes.decode("utf-8", errors="replace")
 
-    if "application/x-www-form-urlencoded" in content_type:
+    if ct_kind == "form":
         parsed = parse_qs(body_text, keep_blank_values=True)
         return _truncate_body(
-            json.dumps(_redact_payload(parsed, redact_fields), indent=2, sort_keys=True)
+            _json_dumps(_redact_payload(parsed, redact_fields))
         )
 
     return _truncate_body(body_text)
 
 
-def capture_request_headers(request, *, redact_headers: set[str] | None = None) -> dict:
-    redact_headers = {header.lower() for header in (redact_headers or DEFAULT_REDACT_HEADERS)}
-    headers = dict(request.headers)
+def capture_request_headers(request, *, redact_headers: set[str] | frozenset[str] | None = None) -> dict:
+    redact_headers = _lowered(redact_headers or DEFAULT_REDACT_HEADERS)
+    headers = _headers_snapshot(request)
     redacted = {}
     for key, value in headers.items():
         if key.lower() in redact_headers and isinstance(value, str):
@@ -136,8 +252,8 @@ def extract_response_error(response) -> tuple[str, str]:
         body = response.content.decode("utf-8", errors="replace")
     if "application/json" in content_type and body:
         try:
-            payload = json.loads(body)
-        except json.JSONDecodeError:
+            payload = json.loads(response.content)
+        except (json.JSONDecodeError, UnicodeDecodeError):
             return "", body
         if isinstance(payload, dict):
             error = payload.get("error") or payload.get("error_description") or ""
@@ -161,8 +277,8 @@ def log_request_error(
     *,
     error: str | None = None,
     response_body: str | None = None,
-    redact_fields: set[str] | None = None,
-    redact_headers: set[str] | None = None,
+    redact_fields: set[str] | frozenset[str] | None = None,
+    redact_headers: set[str] | frozenset[str] | None = None,
 ) -> None:
     if response.status_code < 400:
         return
@@ -181,7 +297,7 @@ def log_request_error(
         status_code=response.status_code,
         error=error or "",
         request_headers=capture_request_headers(request, redact_headers=redact_headers),
-        request_query={key: request.GET.getlist(key) for key in request.GET.keys()},
+        request_query=dict(request.GET.lists()),
         request_body=capture_request_body(request, redact_fields=redact_fields),
         response_body=response_body or "",
         remote_addr=client_ip(request),
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .context_processors import invalidate_pending_interactions_count
+from .views import invalidate_sitemap
+
+
+@receiver(post_save, sender="blog.Comment")
+@receiver(post_delete, sender="blog.Comment")
+@receiver(post_save, sender="micropub.Webmention")
+@receiver(post_delete, sender="micropub.Webmention")
+def interaction_changed(sender, instance, **kwargs):
+    invalidate_pending_interactions_count()
+
+
+@receiver(post_save, sender="core.Page")
+@receiver(post_delete, sender="core.Page")
+@receiver(post_save, sender="blog.Post")
+@receiver(post_delete, sender="blog.Post")
+@receiver(post_save, sender="blog.Tag")
+@receiver(post_delete, sender="blog.Tag")
+@receiver(post_save, sender="core.SiteConfiguration")
+def sitemap_content_changed(sender, instance, **kwargs):
+    invalidate_sitemap()
@@ -1,3 +1,4 @@
+import csv
 import importlib
 import io
 import json
@@ -10,14 +11,19 @@ from pathlib import Path
 from typing import Optional
 from unittest import mock
 
+import markdown
+
 from django.contrib.auth import get_user_model
-from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.template import Context, Template
 from django.test import TestCase, RequestFactory
-from django.test.utils import override_settings
-from django.urls import reverse
+from django.db import connection
+from django.http import JsonResponse
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
 from django.templatetags.static import static
 from django.utils import timezone
 from django.core.files.storage import FileSystemStorage
@@ -27,10 +33,13 @@ from .models import (
     MenuItem,
     Page,
     Redirect,
+    RequestErrorLog,
     SiteConfiguration,
     HCard,
     HCardEmail,
+    HCardPhoto,
     HCardUrl,
+    PluginInstall,
     ThemeInstall,
 )
 from .apps import CoreConfig, _reset_startup_state
@@ -40,15 +49,37 @@ from .themes import (
     get_theme,
     ingest_theme_archive,
     install_theme_from_git,
+    list_theme_entries,
     resolve_theme_settings,
     theme_storage_healthcheck,
     theme_exists_in_storage,
     update_theme_from_git,
 )
-from .theme_validation import validate_theme_dir
+from .theme_validation import load_theme_metadata, validate_theme_dir
 from .test_utils import build_test_theme
-from .views import server_error
-from blog.models import Post, Tag
+from .context_processors import interactions_counts, site_configuration
+from .plugin_loader import (
+    PluginInstallError,
+    _migrate_plugin_app,
+    _read_checkout_metadata,
+    _run_git,
+    _write_installed_plugins_file,
+    clear_plugin_cache,
+    discover_plugins,
+    get_plugin_definition,
+    install_plugin_from_git,
+    update_plugin_from_git,
+)
+from .og import absolute_url, first_attachment_image_url, summarize_markdown
+from .rendering import render_markdown
+from .request_logs import _redact_payload, capture_request_body, extract_response_error, log_request_error
+from .context_processors import theme as theme_context
+from .plugins import BasePlugin, BaseWidget, PluginRegistry
+from .widgets import CodeMirrorTextarea, EasyMDETextarea
+from .views import favicon, robots_txt, server_error, sitemap
+from blog.models import Comment, Post, Tag
+from files.models import Attachment, File
+from micropub.models import Webmention
 
 
 class PageModelTests(TestCase):
@@ -139,6 +170,25 @@ class HealthzTests(TestCase):
 
 
 class SitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_sitemap_is_cached_until_content_changes(self):
+        request = RequestFactory().get("/sitemap.xml")
+        first = sitemap(request)
+        self.assertTrue(first.streaming)
+        first_body = first.getvalue()
+
+        with self.assertNumQueries(0):
+            second = sitemap(request)
+        self.assertEqual(second.content, first_body)
+
+        Page.objects.create(title="New", slug="new", content="text", published_on=timezone.now())
+        response = self.client.get("/sitemap.xml")
+
+        self.assertIn(f"http://testserver{reverse('page', kwargs={'slug': 'new'})}", response.getvalue().decode())
+
     def test_includes_public_routes_and_excludes_admin(self):
         page = Page.objects.create(
             title="About",
@@ -165,7 +215,7 @@ class SitemapTests(TestCase):
 
         response = self.client.get("/sitemap.xml")
 
-        body = response.content.decode()
+        body = response.getvalue().decode()
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response["Content-Type"].startswith("application/xml"))
         self.assertIn("http://testserver/", body)
@@ -174,6 +224,8 @@ class SitemapTests(TestCase):
         self.assertIn(f"http://testserver{post.get_absolute_url()}", body)
         self.assertIn(f"http://testserver{reverse('posts_by_tag', kwargs={'tag': tag.tag})}", body)
         self.assertNotIn("/admin/", body)
+        self.assertTrue(body.startswith('<?xml version="1.0" encoding="UTF-8"?>\n<urlset'))
+        self.assertTrue(body.endswith("</url>\n</urlset>"))
 
 
 class ServerErrorHandlerTests(TestCase):
@@ -191,6 +243,401 @@ class ServerErrorHandlerTests(TestCase):
         self.assertIn("Server error", response.content.decode())
 
 
+class SiteConfigurationContextTests(TestCase):
+    def test_site_author_note_is_rendered_as_markdown(self):
+        user = get_user_model().objects.create_user(username="author", password="password")
+        HCard.objects.create(user=user, name="Author", note="Hello **there**")
+        config = SiteConfiguration.get_solo()
+        config.site_author = user
+        config.save()
+
+        request = RequestFactory().get("/")
+        first = site_configuration(request)["site_author_hcard"].note_html
+        second = site_configuration(request)["site_author_hcard"].note_html
+
+        self.assertEqual(first, "<p>Hello <strong>there</strong></p>")
+        self.assertEqual(second, first)
+
+    def test_site_configuration_is_loaded_once_per_request(self):
+        SiteConfiguration.get_solo()
+        request = RequestFactory().get("/")
+
+        with CaptureQueriesContext(connection) as queries:
+            site_configuration(request)
+            theme_context(request)
+
+        config_queries = [q for q in queries.captured_queries if "core_siteconfiguration" in q["sql"]]
+        self.assertEqual(len(config_queries), 1)
+
+    def test_favicon_and_site_author_are_joined(self):
+        user = get_user_model().objects.create_user(username="author", password="password")
+        favicon = File.objects.create(kind=File.IMAGE, file=SimpleUploadedFile("icon.png", b"png"))
+        config = SiteConfiguration.get_solo()
+        config.site_author = user
+        config.favicon = favicon
+        config.save()
+        request = RequestFactory().get("/")
+
+        context = site_configuration(request)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(context["settings"].favicon.file.url, favicon.file.url)
+            self.assertEqual(context["settings"].site_author.username, "author")
+        self.assertEqual(context["og_default_image"], f"http://testserver{favicon.file.url}")
+
+    def test_robots_and_favicon_reuse_request_site_configuration(self):
+        config = SiteConfiguration.get_solo()
+        config.robots_txt = "User-agent: *"
+        config.save()
+        request = RequestFactory().get("/robots.txt")
+        request._site_config = config
+
+        with self.assertNumQueries(0):
+            robots_response = robots_txt(request)
+            favicon_response = favicon(request)
+
+        self.assertEqual(robots_response.content, b"User-agent: *")
+        self.assertEqual(favicon_response.status_code, 302)
+
+    def test_menus_are_loaded_in_one_query(self):
+        main = Menu.objects.create(title="Main")
+        footer = Menu.objects.create(title="Footer")
+        MenuItem.objects.create(menu=main, text="Later", url="/later", weight=10)
+        MenuItem.objects.create(menu=main, text="First", url="/first", weight=0)
+        MenuItem.objects.create(menu=footer, text="Legal", url="/legal")
+        config = SiteConfiguration.get_solo()
+        config.main_menu = main
+        config.footer_menu = footer
+        config.save()
+        request = RequestFactory().get("/")
+        request._site_config = config
+
+        with self.assertNumQueries(1):
+            context = site_configuration(request)
+
+        self.assertEqual([item.text for item in context["menu_items"]], ["First", "Later"])
+        self.assertEqual([item.text for item in context["footer_menu_items"]], ["Legal"])
+
+
+class EditorWidgetMediaTests(TestCase):
+    def test_media_is_built_once_and_survives_merging(self):
+        first = CodeMirrorTextarea().media
+        self.assertIs(CodeMirrorTextarea(mode="css").media, first)
+        self.assertIs(EasyMDETextarea().media, EasyMDETextarea().media)
+
+        combined = first + EasyMDETextarea().media
+
+        self.assertIn("core/js/easymde-init.js", str(combined))
+        self.assertNotIn("easymde", str(CodeMirrorTextarea().media))
+
+
+class RenderMarkdownTests(TestCase):
+    def test_plain_text_matches_markdown_output(self):
+        md = markdown.Markdown(extensions=["fenced_code"])
+        samples = [
+            "Hello there",
+            "Writes code. Likes tea, cats (mostly) and 42 other things?",
+            "Hello *there*",
+            "1. First",
+            "Line one\nLine two",
+            "A & B <b>bold</b>",
+            " indented",
+            "trailing ",
+            "See https://example.com",
+        ]
+        for sample in samples:
+            with self.subTest(sample=sample):
+                self.assertEqual(render_markdown(sample), md.reset().convert(sample))
+
+    def test_empty_text_renders_nothing(self):
+        self.assertEqual(render_markdown(""), "")
+
+
+class SummarizeMarkdownTests(TestCase):
+    def test_strips_markup_and_truncates(self):
+        content = "# Title\n\nSome *emphasised* text with a [link](https://example.com).\n\n```\ncode\n```"
+
+        self.assertEqual(summarize_markdown(content), "Title\nSome emphasised text with a link.\ncode")
+        self.assertEqual(summarize_markdown(content, length=10), "Title\nS...")
+
+    def test_long_content_stops_after_the_summary(self):
+        content = "\n\n".join(f"Paragraph {i} with *some* text." for i in range(500))
+
+        with mock.patch("core.og.strip_tags") as strip:
+            summary = summarize_markdown(content, length=40)
+
+        strip.assert_not_called()
+        self.assertEqual(summary, "Paragraph 0 with some text.\nParagraph...")
+
+    def test_empty_content_has_no_summary(self):
+        self.assertEqual(summarize_markdown(""), "")
+
+class AbsoluteUrlTests(TestCase):
+    def test_keeps_absolute_and_expands_relative_urls(self):
+        request = RequestFactory().get("/")
+
+        self.assertEqual(absolute_url(request, "https://cdn.example.com/a.png"), "https://cdn.example.com/a.png")
+        self.assertEqual(absolute_url(request, "/media/a.png"), "http://testserver/media/a.png")
+        self.assertEqual(absolute_url(request, ""), "")
+
+    def test_long_urls_bypass_the_parse_cache(self):
+        request = RequestFactory().get("/")
+        long_url = "https://example.com/" + "a" * 4096
+
+        self.assertEqual(absolute_url(request, long_url), long_url)
+        self.assertEqual(absolute_url(request, "/" + "a" * 4096), "http://testserver/" + "a" * 4096)
+
+class FirstAttachmentImageUrlTests(TestCase):
+    def test_returns_first_image_attachment(self):
+        doc = File.objects.create(kind=File.DOC, file=SimpleUploadedFile("notes.txt", b"notes"))
+        image = File.objects.create(
+            kind=File.IMAGE,
+            file=SimpleUploadedFile("photo.png", b"png", content_type="image/png"),
+            alt_text="A photo",
+        )
+        page = Page.objects.create(title="About", slug="about", content="Body", published_on=timezone.now())
+        for order, asset in enumerate((doc, image)):
+            Attachment.objects.create(content_object=page, asset=asset, sort_order=order)
+
+        attachments = Page.objects.prefetch_related("attachments__asset").get(pk=page.pk).attachments.all()
+        with self.assertNumQueries(0):
+            url, alt = first_attachment_image_url(attachments)
+
+        self.assertEqual((url, alt), (image.file.url, "A photo"))
+
+    def test_no_attachments(self):
+        self.assertEqual(first_attachment_image_url([]), ("", ""))
+        self.assertEqual(first_attachment_image_url(None), ("", ""))
+
+class RequestLogCaptureTests(TestCase):
+    def test_json_body_is_redacted_and_pretty_printed(self):
+        request = RequestFactory().post(
+            "/micropub",
+            data=json.dumps({"name": "Café", "access_token": "abcdefghijklmnop", "tags": ["a"]}),
+            content_type="application/json",
+        )
+
+        body = capture_request_body(request, redact_fields={"access_token"})
+
+        self.assertEqual(
+            body,
+            '{\n  "access_token": "abcdef...mnop",\n  "name": "Café",\n  "tags": [\n    "a"\n  ]\n}',
+        )
+
+    def test_json_body_without_sensitive_keys_is_logged_as_sent(self):
+        raw = '{"name": "hello", "content": "token-free"}'
+        request = RequestFactory().post("/micropub", data=raw, content_type="application/json")
+
+        with mock.patch("core.request_logs.json.loads") as loads:
+            body = capture_request_body(request, redact_fields={"access_token"})
+
+        loads.assert_not_called()
+        self.assertEqual(body, raw)
+
+    def test_json_body_with_nan_is_still_redacted(self):
+        raw = '{"access_token": "abcdefghijklmnop", "ratio": NaN}'
+        request = RequestFactory().post("/micropub", data=raw, content_type="application/json")
+
+        body = capture_request_body(request, redact_fields={"access_token"})
+
+        self.assertIn("abcdef...mnop", body)
+        self.assertNotIn("ghijkl", body)
+
+    def test_escaped_sensitive_keys_are_still_redacted(self):
+        raw = '{"\\u0061ccess_token": "abcdefghijklmnop"}'
+        request = RequestFactory().post("/micropub", data=raw, content_type="application/json")
+
+        body = capture_request_body(request, redact_fields={"access_token"})
+
+        self.assertIn("abcdef...mnop", body)
+        self.assertNotIn("ghijkl", body)
+
+    def test_json_body_is_parsed_once_per_request(self):
+        request = RequestFactory().post(
+            "/micropub", data=json.dumps({"access_token": "abcdefghijklmnop"}), content_type="application/json"
+        )
+
+        with mock.patch("core.request_logs.json.loads", wraps=json.loads) as loads:
+            first = capture_request_body(request, redact_fields={"access_token"})
+            second = capture_request_body(request, redact_fields={"access_token"})
+
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_redaction_shares_untouched_subtrees(self):
+        untouched = {"items": [{"name": "a"}, {"name": "b"}]}
+        nested = {"access_token": "abcdefghijklmnop"}
+        for _ in range(5000):
+            nested = {"child": nested}
+        payload = {"untouched": untouched, "nested": nested}
+
+        redacted = _redact_payload(payload, {"access_token"})
+
+        self.assertIs(redacted["untouched"], untouched)
+        leaf = redacted["nested"]
+        while "child" in leaf:
+            leaf = leaf["child"]
+        self.assertEqual(leaf, {"access_token": "abcdef...mnop"})
+        self.assertEqual(payload["untouched"], {"items": [{"name": "a"}, {"name": "b"}]})
+
+    def test_string_list_fields_are_redacted_in_one_pass(self):
+        untouched = ["visible"] * 100
+        payload = {f"field{i}": untouched for i in range(200)}
+        payload["code[]"] = ["abcdefghijklmnop", "", "short"]
+
+        redacted = _redact_payload(payload, {"code"})
+
+        self.assertEqual(redacted["code[]"], ["abcdef...mnop", "", "***"])
+        self.assertIs(redacted["field0"], untouched)
+        self.assertEqual(payload["code[]"][0], "abcdefghijklmnop")
+
+    def test_oversized_body_is_not_read(self):
+        request = RequestFactory().post("/micropub", data=b"x" * 50000, content_type="application/json")
+
+        with mock.patch.object(type(request), "body", new_callable=mock.PropertyMock) as body:
+            captured = capture_request_body(request)
+
+        body.assert_not_called()
+        self.assertEqual(captured, "(body 50000 bytes; not captured)")
+
+    def test_invalid_json_body_is_logged_verbatim(self):
+        request = RequestFactory().post("/micropub", data=b"{not json\xff", content_type="application/json")
+
+        self.assertEqual(capture_request_body(request), "{not json\ufffd")
+
+    def test_consumed_form_body_falls_back_to_parsed_post(self):
+        request = RequestFactory().post(
+            "/token",
+            data="code=abcdefghijklmnop&me=https%3A%2F%2Fexample.com%2F",
+            content_type="application/x-www-form-urlencoded; charset=utf-8",
+        )
+        request.POST  # consume the stream as a form view would
+        request._read_started = True
+        del request._body
+
+        body = capture_request_body(request, redact_fields={"code"})
+
+        self.assertEqual(json.loads(body), {"code": ["abcdef...mnop"], "me": ["https://example.com/"]})
+
+    def test_log_request_error_keeps_repeated_query_params(self):
+        request = RequestFactory().get("/micropub?q=config&tag=a&tag=b")
+
+        log_request_error("micropub", request, JsonResponse({"error": "invalid_request"}, status=400))
+
+        log = RequestErrorLog.objects.get()
+        self.assertEqual(log.request_query, {"q": ["config"], "tag": ["a", "b"]})
+        self.assertEqual(log.error, "invalid_request")
+
+    def test_extract_response_error_reads_json_error(self):
+        response = JsonResponse({"error": "invalid_request"}, status=400)
+
+        self.assertEqual(extract_response_error(response), ("invalid_request", '{"error": "invalid_request"}'))
+
+class RequestErrorLogBackfillTests(TestCase):
+    def test_copy_rows_are_csv_with_nulls_distinct_from_empty_strings(self):
+        migration = importlib.import_module("core.migrations.0034_requesterrorlog")
+        created_at = timezone.now()
+        row = (
+            "POST",
+            "/token",
+            400,
+            'bad, "quoted"\nerror',
+            {"Host": "example.com"},
+            {},
+            "",
+            "",
+            None,
+            "",
+            "application/json",
+            created_at,
+        )
+
+        data = migration._csv_rows("indieauth", [row])
+
+        parsed = next(csv.reader(io.StringIO(data)))
+        self.assertEqual(len(parsed), len(migration.LOG_FIELDS) + 1)
+        self.assertEqual(parsed[:5], ["indieauth", "POST", "/token", "400", 'bad, "quoted"\nerror'])
+        self.assertEqual(json.loads(parsed[5]), {"Host": "example.com"})
+        self.assertNotIn("\t", data)
+        # NULL is an unquoted empty field; empty strings stay quoted.
+        self.assertIn(',"",,"",', data)
+
+
+class InteractionsCountsTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.factory = RequestFactory()
+        self.staff = get_user_model().objects.create_user(
+            username="editor",
+            email="editor@example.com",
+            password="password",
+            is_staff=True,
+        )
+        self.post = Post.objects.create(
+            title="Hello",
+            slug="hello",
+            content="text",
+            kind=Post.ARTICLE,
+            published_on=timezone.now(),
+        )
+
+    def _admin_request(self):
+        request = self.factory.get("/admin/")
+        request.resolver_match = resolve("/admin/")
+        request.user = self.staff
+        return request
+
+    def _count(self):
+        return interactions_counts(self._admin_request())["interactions_pending_count"]
+
+    def test_counts_pending_comments_and_local_webmentions(self):
+        Comment.objects.create(post=self.post, author_name="Ada", content="Hi")
+        Comment.objects.create(
+            post=self.post, author_name="Bob", content="Hi", status=Comment.APPROVED
+        )
+        Webmention.objects.create(
+            source="https://remote.example/a", target="http://testserver/posts/hello/"
+        )
+        Webmention.objects.create(
+            source="https://remote.example/b", target="https://elsewhere.example/"
+        )
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self._count(), 2)
+
+    def test_count_stops_at_cap(self):
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author_name="Ada", content="Hi") for _ in range(3)
+        )
+        with mock.patch("core.context_processors.PENDING_INTERACTIONS_CAP", 2):
+            context = interactions_counts(self._admin_request())
+
+        self.assertEqual(context["interactions_pending_count"], 2)
+        self.assertTrue(context["interactions_pending_capped"])
+
+    def test_skips_non_admin_views(self):
+        request = self.factory.get("/")
+        request.resolver_match = resolve("/")
+        request.user = self.staff
+
+        with self.assertNumQueries(0):
+            self.assertEqual(interactions_counts(request), {})
+
+    def test_count_is_cached_until_an_interaction_changes(self):
+        self.assertEqual(self._count(), 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self._count(), 0)
+
+        comment = Comment.objects.create(post=self.post, author_name="Ada", content="Hi")
+        self.assertEqual(self._count(), 1)
+
+        comment.status = Comment.APPROVED
+        comment.save()
+        self.assertEqual(self._count(), 0)
+
+
 class HCardTests(TestCase):
     def test_can_create_empty_hcard(self):
         hcard = HCard.objects.create()
@@ -207,6 +654,24 @@ class HCardTests(TestCase):
         self.assertEqual(hcard.emails.count(), 2)
         self.assertEqual(hcard.urls.count(), 2)
 
+    def test_note_html_is_rendered_on_save(self):
+        hcard = HCard.objects.create(note="Hello *there*")
+        self.assertEqual(hcard.note_html, "<p>Hello <em>there</em></p>")
+
+        hcard.note = ""
+        hcard.save(update_fields=["note"])
+        hcard.refresh_from_db()
+        self.assertEqual(hcard.note_html, "")
+
+    def test_primary_photo_uses_prefetched_photos(self):
+        hcard = HCard.objects.create(name="Example")
+        HCardPhoto.objects.create(hcard=hcard, value="https://example.com/b.jpg", sort_order=2)
+        HCardPhoto.objects.create(hcard=hcard, value="https://example.com/a.jpg", sort_order=1)
+
+        hcard = HCard.objects.prefetch_related(HCard.photos_prefetch()).get(pk=hcard.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(hcard.primary_photo_url, "https://example.com/a.jpg")
+
     def test_can_assign_and_unassign_user(self):
         user = get_user_model().objects.create_user(
             username="person",
@@ -393,6 +858,42 @@ class ThemeReconcileCommandTests(TestCase):
                             )
 
 
+class StartupCommandTests(TestCase):
+    def test_db_wait_backs_off_until_tcp_probe_succeeds(self):
+        probe = mock.Mock()
+        with (
+            mock.patch(
+                "core.management.commands.startup._db_address", return_value=("db", 5432)
+            ),
+            mock.patch(
+                "core.management.commands.startup.socket.create_connection",
+                side_effect=[OSError("refused"), OSError("refused"), probe],
+            ) as create_connection,
+            mock.patch("core.management.commands.startup.time.sleep") as sleep,
+        ):
+            call_command(
+                "startup",
+                "--no-migrate",
+                "--no-bootstrap-storage",
+                "--no-theme-reconcile",
+                "--no-collectstatic",
+                stdout=io.StringIO(),
+            )
+
+        self.assertEqual(create_connection.call_count, 3)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.05, 0.1])
+        probe.close.assert_called_once()
+
+    def test_runs_steps_with_bootstrap_alongside_migrate(self):
+        for extra_args in ([], ["--serial"]):
+            with mock.patch("core.management.commands.startup.call_command") as command:
+                call_command("startup", "--no-db-wait", *extra_args, stdout=io.StringIO())
+
+            names = [c.args[0] for c in command.call_args_list]
+            self.assertCountEqual(names[:2], ["migrate", "bootstrap_storage"])
+            self.assertEqual(names[2:], ["theme_reconcile", "collectstatic"])
+
+
 class ThemeListCommandTests(TestCase):
     def test_list_command_outputs_text(self):
         ThemeInstall.objects.create(
@@ -427,6 +928,19 @@ class ThemeListCommandTests(TestCase):
         self.assertEqual(payload[0]["source_ref"], "main")
         self.assertEqual(payload[0]["source_url"], "https://example.com/themes.git")
 
+    def test_list_command_streams_json_rows(self):
+        ThemeInstall.objects.create(slug="beta", source_type=ThemeInstall.SOURCE_UPLOAD)
+        ThemeInstall.objects.create(slug="alpha", source_type=ThemeInstall.SOURCE_UPLOAD)
+
+        out = io.StringIO()
+        call_command("theme_list", "--json", stdout=out)
+        empty = io.StringIO()
+        ThemeInstall.objects.all().delete()
+        call_command("theme_list", "--json", stdout=empty)
+
+        self.assertEqual([row["slug"] for row in json.loads(out.getvalue())], ["alpha", "beta"])
+        self.assertEqual(empty.getvalue(), "[]\n")
+
     def test_list_command_filters_by_slug(self):
         ThemeInstall.objects.create(slug="alpha", source_type=ThemeInstall.SOURCE_UPLOAD)
         ThemeInstall.objects.create(slug="beta", source_type=ThemeInstall.SOURCE_UPLOAD)
@@ -438,6 +952,287 @@ class ThemeListCommandTests(TestCase):
         self.assertIn("beta", output)
         self.assertNotIn("alpha", output)
 
+    def test_list_command_slug_filter_uses_single_query(self):
+        ThemeInstall.objects.create(slug="beta", source_type=ThemeInstall.SOURCE_UPLOAD)
+
+        with self.assertNumQueries(1):
+            call_command("theme_list", "--slug", "beta", "--json", stdout=io.StringIO())
+
+        with self.assertNumQueries(1), self.assertRaises(CommandError):
+            call_command("theme_list", "--slug", "missing", stdout=io.StringIO())
+
+
+class PluginLoaderTests(TestCase):
+    def setUp(self):
+        clear_plugin_cache()
+        self.addCleanup(clear_plugin_cache)
+
+    def _write_plugin(self, root: Path, slug: str, metadata: dict) -> Path:
+        plugin_dir = root / slug
+        plugin_dir.mkdir(exist_ok=True)
+        (plugin_dir / "plugin.json").write_text(json.dumps(metadata))
+        return plugin_dir
+
+    def test_discover_plugins_reuses_parsed_metadata(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            self._write_plugin(root, "alpha", {"name": "alpha", "version": "1.0"})
+            (root / "not-a-plugin").mkdir()
+
+            self.assertEqual([p.name for p in discover_plugins(base_dir=root)], ["alpha"])
+            with mock.patch("core.plugin_loader.json.loads") as load:
+                plugin = get_plugin_definition("alpha", base_dir=root)
+
+            load.assert_not_called()
+            self.assertEqual(plugin.version, "1.0")
+
+    def test_checkout_metadata_accepts_what_stdlib_json_accepts(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "plugin.json").write_text('{"name": "alpha", "weight": NaN, "id": 18446744073709551616}')
+
+            metadata = _read_checkout_metadata(root)
+
+        self.assertEqual(metadata["name"], "alpha")
+        self.assertEqual(metadata["id"], 2**64)
+
+    def test_discover_plugins_picks_up_changes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            self._write_plugin(root, "alpha", {"name": "alpha", "version": "1.0"})
+            discover_plugins(base_dir=root)
+
+            self._write_plugin(root, "alpha", {"name": "alpha", "version": "1.0.1"})
+            self._write_plugin(root, "beta", {"name": "beta"})
+            os.utime(root, ns=(0, 0))
+
+            plugins = {p.name: p for p in discover_plugins(base_dir=root)}
+
+        self.assertEqual(plugins["alpha"].version, "1.0.1")
+        self.assertIn("beta", plugins)
+
+    def _git(self, repo_dir: Path, *args: str) -> str:
+        env = os.environ.copy()
+        env.update(
+            {
+                "GIT_AUTHOR_NAME": "Test",
+                "GIT_AUTHOR_EMAIL": "test@example.com",
+                "GIT_COMMITTER_NAME": "Test",
+                "GIT_COMMITTER_EMAIL": "test@example.com",
+            }
+        )
+        result = subprocess.run(
+            ["git", "-C", str(repo_dir), *args],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=env,
+        )
+        return result.stdout.strip()
+
+    def test_update_from_git_reuses_existing_checkout(self):
+        with tempfile.TemporaryDirectory() as repo_root, tempfile.TemporaryDirectory() as plugins_root:
+            repo_dir = Path(repo_root)
+            self._write_plugin(repo_dir.parent, repo_dir.name, {"name": "alpha", "django_app": "alpha", "version": "1.0"})
+            self._git(repo_dir, "init")
+            self._git(repo_dir, "add", ".")
+            self._git(repo_dir, "commit", "-m", "1.0")
+            install_dir = Path(plugins_root) / "alpha"
+            self._git(Path(plugins_root), "clone", "--depth", "1", str(repo_dir), "alpha")
+            (install_dir / "local-marker").write_text("kept")
+
+            self._write_plugin(repo_dir.parent, repo_dir.name, {"name": "alpha", "django_app": "alpha", "version": "2.0"})
+            self._git(repo_dir, "commit", "-am", "2.0")
+            install = PluginInstall.objects.create(
+                name="alpha",
+                django_app="alpha",
+                source_type=PluginInstall.SOURCE_GIT,
+                source_url=str(repo_dir),
+            )
+
+            with mock.patch("django.core.management.call_command"), mock.patch(
+                "core.plugin_loader._touch_wsgi"
+            ):
+                plugin = update_plugin_from_git(install, base_dir=Path(plugins_root))
+
+            self.assertTrue((install_dir / "local-marker").exists())
+            self.assertEqual(plugin.version, "2.0")
+
+        install.refresh_from_db()
+        self.assertEqual(install.version, "2.0")
+
+    def test_update_from_git_skips_reload_when_commit_is_unchanged(self):
+        with tempfile.TemporaryDirectory() as repo_root, tempfile.TemporaryDirectory() as plugins_root:
+            repo_dir = Path(repo_root)
+            self._write_plugin(repo_dir.parent, repo_dir.name, {"name": "alpha", "django_app": "alpha", "version": "1.0"})
+            self._git(repo_dir, "init")
+            self._git(repo_dir, "add", ".")
+            self._git(repo_dir, "commit", "-m", "1.0")
+            install = PluginInstall.objects.create(
+                name="alpha",
+                django_app="alpha",
+                source_type=PluginInstall.SOURCE_GIT,
+                source_url=str(repo_dir),
+                last_synced_commit=self._git(repo_dir, "rev-parse", "HEAD"),
+            )
+
+            with mock.patch("django.core.management.call_command"), mock.patch(
+                "core.plugin_loader._touch_wsgi"
+            ) as touch_wsgi:
+                update_plugin_from_git(install, base_dir=Path(plugins_root))
+
+        touch_wsgi.assert_not_called()
+
+    def test_install_from_git_checks_out_requested_ref(self):
+        with tempfile.TemporaryDirectory() as repo_root, tempfile.TemporaryDirectory() as plugins_root:
+            repo_dir = Path(repo_root)
+            self._write_plugin(repo_dir.parent, repo_dir.name, {"name": "alpha", "django_app": "alpha", "version": "1.0"})
+            self._git(repo_dir, "init")
+            self._git(repo_dir, "add", ".")
+            self._git(repo_dir, "commit", "-m", "1.0")
+            self._git(repo_dir, "tag", "v1")
+            tagged_commit = self._git(repo_dir, "rev-parse", "HEAD")
+            self._write_plugin(repo_dir.parent, repo_dir.name, {"name": "alpha", "django_app": "alpha", "version": "2.0"})
+            self._git(repo_dir, "commit", "-am", "2.0")
+
+            with mock.patch("django.core.management.call_command"), mock.patch(
+                "core.plugin_loader._touch_wsgi"
+            ), mock.patch("core.plugin_loader._get_installed_plugin_apps", return_value=[]), mock.patch(
+                "core.plugin_loader._write_installed_plugins_file"
+            ):
+                plugin = install_plugin_from_git(str(repo_dir), "alpha", ref="v1", base_dir=Path(plugins_root))
+
+        self.assertEqual(plugin.version, "1.0")
+        self.assertEqual(PluginInstall.objects.get(name="alpha").last_synced_commit, tagged_commit)
+
+    def test_install_from_git_at_commit_skips_branch_clone(self):
+        with tempfile.TemporaryDirectory() as repo_root, tempfile.TemporaryDirectory() as plugins_root:
+            repo_dir = Path(repo_root)
+            self._write_plugin(repo_dir.parent, repo_dir.name, {"name": "alpha", "django_app": "alpha", "version": "1.0"})
+            self._git(repo_dir, "init")
+            self._git(repo_dir, "add", ".")
+            self._git(repo_dir, "commit", "-m", "1.0")
+            first_commit = self._git(repo_dir, "rev-parse", "HEAD")
+            self._write_plugin(repo_dir.parent, repo_dir.name, {"name": "alpha", "django_app": "alpha", "version": "2.0"})
+            self._git(repo_dir, "commit", "-am", "2.0")
+
+            with mock.patch("django.core.management.call_command"), mock.patch(
+                "core.plugin_loader._touch_wsgi"
+            ), mock.patch("core.plugin_loader._get_installed_plugin_apps", return_value=[]), mock.patch(
+                "core.plugin_loader._write_installed_plugins_file"
+            ), mock.patch("core.plugin_loader._run_git", wraps=_run_git) as run_git:
+                plugin = install_plugin_from_git(
+                    str(repo_dir), "alpha", ref=first_commit, base_dir=Path(plugins_root)
+                )
+
+        self.assertEqual(plugin.version, "1.0")
+        self.assertFalse(any("--branch" in call.args[0] for call in run_git.call_args_list))
+
+    def test_install_from_git_updates_existing_record_in_one_query(self):
+        with tempfile.TemporaryDirectory() as repo_root, tempfile.TemporaryDirectory() as plugins_root:
+            repo_dir = Path(repo_root)
+            self._write_plugin(repo_dir.parent, repo_dir.name, {"name": "alpha", "django_app": "alpha", "version": "2.0"})
+            self._git(repo_dir, "init")
+            self._git(repo_dir, "add", ".")
+            self._git(repo_dir, "commit", "-m", "2.0")
+            existing = PluginInstall.objects.create(
+                name="alpha",
+                django_app="alpha",
+                source_type=PluginInstall.SOURCE_GIT,
+                version="1.0",
+                last_sync_status=PluginInstall.STATUS_FAILED,
+                last_sync_error="boom",
+            )
+
+            with mock.patch("django.core.management.call_command"), mock.patch(
+                "core.plugin_loader._touch_wsgi"
+            ), mock.patch("core.plugin_loader._get_installed_plugin_apps", return_value=["alpha"]), self.assertNumQueries(1):
+                install_plugin_from_git(str(repo_dir), "alpha", base_dir=Path(plugins_root))
+
+        record = PluginInstall.objects.get(name="alpha")
+        self.assertEqual(record.pk, existing.pk)
+        self.assertEqual(record.installed_at, existing.installed_at)
+        self.assertEqual(record.version, "2.0")
+        self.assertEqual(record.source_url, str(repo_dir))
+        self.assertEqual((record.last_sync_status, record.last_sync_error), (PluginInstall.STATUS_SUCCESS, ""))
+
+    def test_install_from_git_rejects_repository_without_metadata(self):
+        with tempfile.TemporaryDirectory() as repo_root, tempfile.TemporaryDirectory() as plugins_root:
+            repo_dir = Path(repo_root)
+            (repo_dir / "README.md").write_text("no metadata")
+            self._git(repo_dir, "init")
+            self._git(repo_dir, "add", ".")
+            self._git(repo_dir, "commit", "-m", "init")
+
+            with self.assertRaisesMessage(PluginInstallError, "does not contain a plugin.json"):
+                install_plugin_from_git(str(repo_dir), "alpha", base_dir=Path(plugins_root))
+
+            self.assertFalse((Path(plugins_root) / "alpha").exists())
+
+    def test_migrate_plugin_app_is_scoped_to_loaded_app(self):
+        with mock.patch("django.core.management.call_command") as call:
+            _migrate_plugin_app("core")
+            _migrate_plugin_app("not_loaded_yet")
+
+        self.assertEqual(
+            call.call_args_list,
+            [
+                mock.call("migrate", "core", verbosity=0),
+                mock.call("migrate", "--run-syncdb", verbosity=0),
+            ],
+        )
+
+    def test_write_installed_plugins_file_replaces_module(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_dir = Path(tmpdir) / "config"
+            config_dir.mkdir()
+            (config_dir / "installed_plugins.py").write_text("INSTALLED_PLUGIN_APPS = []\n")
+
+            with override_settings(BASE_DIR=Path(tmpdir)):
+                _write_installed_plugins_file(["alpha", "beta"])
+
+            namespace = {}
+            exec((config_dir / "installed_plugins.py").read_text(), namespace)
+            self.assertEqual(namespace["INSTALLED_PLUGIN_APPS"], ["alpha", "beta"])
+            self.assertEqual(sorted(p.name for p in config_dir.iterdir()), ["installed_plugins.py"])
+
+class PluginRegistryTests(TestCase):
+    def test_widget_lookups_are_refreshed_on_register(self):
+        class AlphaWidget(BaseWidget):
+            slug = "alpha"
+            label = "Alpha"
+
+            def render(self, config, request=None):
+                return ""
+
+        class BetaWidget(AlphaWidget):
+            slug = "beta"
+            label = "Beta"
+
+        class AlphaPlugin(BasePlugin):
+            name = "alpha"
+
+            def get_widget_types(self):
+                return [AlphaWidget]
+
+        class BetaPlugin(BasePlugin):
+            name = "beta"
+
+            def get_widget_types(self):
+                return [BetaWidget]
+
+        registry = PluginRegistry()
+        registry.register(AlphaPlugin())
+        self.assertIs(registry.get_widget_type("alpha"), AlphaWidget)
+        self.assertIsNone(registry.get_widget_type("beta"))
+
+        registry.register(BetaPlugin())
+
+        self.assertIs(registry.get_widget_type("beta"), BetaWidget)
+        self.assertEqual(registry.get_all_widget_types(), [AlphaWidget, BetaWidget])
+        self.assertEqual(registry.widget_choices(), [("alpha", "Alpha"), ("beta", "Beta")])
+
 
 class ThemeStorageTests(TestCase):
     def test_theme_exists_in_storage_handles_missing_key_error(self):
@@ -589,6 +1384,45 @@ class ThemeValidationTests(TestCase):
         self.assertIn("missing_templates", codes)
         self.assertIn("missing_static", codes)
 
+    def test_load_theme_metadata_reports_missing_and_invalid_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            meta_path = Path(tmp_dir) / "theme.json"
+            missing = load_theme_metadata(meta_path)
+            meta_path.write_bytes(b'{"label": "caf\xe9"}')
+            not_utf8 = load_theme_metadata(meta_path)
+            meta_path.write_text('{"label": "Café"}', encoding="utf-8")
+            valid = load_theme_metadata(meta_path)
+            meta_path.write_text('{"label": "Big", "max": 18446744073709551616}')
+            big_int = load_theme_metadata(meta_path)
+
+        self.assertEqual([issue.code for issue in missing[1]], ["missing_meta"])
+        self.assertEqual([issue.code for issue in not_utf8[1]], ["invalid_meta"])
+        self.assertEqual(valid, ({"label": "Café"}, []))
+        self.assertEqual(big_int, ({"label": "Big", "max": 2**64}, []))
+
+    def test_validate_theme_dir_handles_non_string_slug(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            theme_dir = self._build_theme_dir(
+                Path(tmp_dir), slug="listy", metadata={"slug": ["listy"], "label": "Listy"}
+            )
+
+            result = validate_theme_dir(theme_dir)
+
+        self.assertEqual(result.slug, "listy")
+
+    def test_validate_theme_dir_rejects_files_named_like_required_dirs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            theme_dir = Path(tmp_dir) / "flat"
+            theme_dir.mkdir()
+            (theme_dir / "templates").write_text("not a directory")
+            (theme_dir / "static").mkdir()
+
+            result = validate_theme_dir(theme_dir)
+
+        codes = {issue.code for issue in result.errors}
+        self.assertIn("missing_templates", codes)
+        self.assertNotIn("missing_static", codes)
+
     def test_validate_theme_dir_uses_expected_slug_when_metadata_slug_missing(self):
         with tempfile.TemporaryDirectory() as tmp_dir:
             theme_dir = self._build_theme_dir(
@@ -662,6 +1496,50 @@ class ThemeTestHelperTests(TestCase):
             self.assertEqual(metadata["slug"], "sample")
             self.assertTrue((theme_dir / "templates" / "post.html").exists())
 
+    def test_list_theme_entries_returns_files_and_directories(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_test_theme(
+                "sample",
+                tmp_dir,
+                extra_files=[
+                    ("templates/partials/nav.html", "<nav></nav>"),
+                    ("static/logo.png", "png"),
+                    ("static/.htaccess", ""),
+                ],
+            )
+
+            files, directories = list_theme_entries(
+                "sample", base_dir=Path(tmp_dir), suffixes=(".html", ".css")
+            )
+
+            self.assertEqual(
+                files,
+                ["static/style.css", "templates/base.html", "templates/partials/nav.html"],
+            )
+            self.assertEqual(directories, ["static", "templates", "templates/partials"])
+
+    def test_get_theme_reloads_when_metadata_changes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            theme_dir = build_test_theme("sample", tmp_dir)
+            build_test_theme("other", tmp_dir)
+
+            with mock.patch(
+                "core.themes.load_theme_metadata", wraps=load_theme_metadata
+            ) as load_metadata:
+                first = get_theme("sample", base_dir=Path(tmp_dir))
+                first.metadata["label"] = "Edited In Place"
+                again = get_theme("sample", base_dir=Path(tmp_dir))
+            (theme_dir / "theme.json").write_text(
+                json.dumps({"label": "Renamed Theme", "slug": "sample"})
+            )
+            renamed = get_theme("sample", base_dir=Path(tmp_dir))
+
+            self.assertEqual(first.label, "Test Theme")
+            self.assertEqual(again.metadata["label"], "Test Theme")
+            self.assertEqual(load_metadata.call_count, 1)
+            self.assertEqual(renamed.label, "Renamed Theme")
+            self.assertIsNone(get_theme("..", base_dir=Path(tmp_dir)))
+
 
 class ThemeInstallTests(TestCase):
     def _theme_archive(self, *, slug: str = "sample", version: str = "1.0") -> SimpleUploadedFile:
@@ -745,6 +1623,22 @@ class ThemeInstallTests(TestCase):
         self.assertIsNotNone(record.last_synced_at)
         self.assertEqual(theme.slug, record.slug)
 
+    def test_upload_reads_disk_backed_upload_in_place(self):
+        with tempfile.TemporaryDirectory() as storage_root, tempfile.TemporaryDirectory() as themes_root:
+            storage = FileSystemStorage(location=storage_root)
+            content = self._theme_archive().read()
+            upload = TemporaryUploadedFile("theme.zip", "application/zip", len(content), None)
+            upload.write(content)
+            upload.seek(0)
+
+            with override_settings(THEMES_ROOT=themes_root, THEME_STORAGE_PREFIX="themes"):
+                with mock.patch("core.themes.get_theme_storage", return_value=storage):
+                    theme = ingest_theme_archive(upload)
+
+            self.assertEqual(theme.slug, "sample")
+            self.assertTrue(Path(upload.temporary_file_path()).exists())
+            upload.close()
+
     def test_upload_updates_existing_install_record(self):
         with tempfile.TemporaryDirectory() as storage_root, tempfile.TemporaryDirectory() as themes_root:
             storage = FileSystemStorage(location=storage_root)
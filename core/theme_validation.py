@@ -1,14 +1,16 @@
 from __future__ import annotations
 
 import json
+import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from django.utils.text import slugify
 
 
-THEME_SETTINGS_FIELD_TYPES = {"string", "text", "boolean", "number", "color", "color_alpha", "select"}
+THEME_SETTINGS_FIELD_TYPES = frozenset({"string", "text", "boolean", "number", "color", "color_alpha", "select"})
 
 
 @dataclass
@@ -40,8 +42,29 @@ class ThemeValidationResult:
         return "; ".join(parts)
 
 
+@lru_cache(maxsize=256)
+def _cached_slugify(value: str) -> str:
+    return slugify(value)
+
+
+def _slugify(value) -> str:
+    # theme.json may hold a non-string (even unhashable) slug; only cache strings.
+    return _cached_slugify(value) if isinstance(value, str) else slugify(value)
+
+
+def _child_dir_names(theme_dir: Path) -> set[str]:
+    """Names of the directories directly inside theme_dir, from one scandir pass."""
+    try:
+        with os.scandir(theme_dir) as entries:
+            return {entry.name for entry in entries if entry.is_dir()}
+    except OSError:
+        return set()
+
+
 def load_theme_metadata(meta_path: Path) -> tuple[dict, list[ThemeValidationIssue]]:
-    if not meta_path.exists():
+    try:
+        metadata = json.loads(meta_path.read_bytes())
+    except FileNotFoundError:
         return {}, [
             ThemeValidationIssue(
                 code="missing_meta",
@@ -50,11 +73,7 @@ def load_theme_metadata(meta_path: Path) -> tuple[dict, list[ThemeValidationIssu
                 hint="Include theme.json at the root of the theme.",
             )
         ]
-
-    try:
-        with meta_path.open() as handle:
-            metadata = json.load(handle)
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, UnicodeDecodeError):
         return {}, [
             ThemeValidationIssue(
                 code="invalid_meta",
@@ -117,7 +136,7 @@ def validate_theme_dir(
         )
 
     metadata_slug = metadata.get("slug") if metadata else None
-    slug = slugify(metadata_slug) if metadata_slug else ""
+    slug = _slugify(metadata_slug) if metadata_slug else ""
     if metadata_slug is not None and not slug:
         errors.append(
             ThemeValidationIssue(
@@ -126,12 +145,10 @@ def validate_theme_dir(
                 message="theme.json must include a slug that slugifies to a value.",
             )
         )
+    dir_slug = _slugify(theme_dir.name)
+    expected = _slugify(expected_slug) if expected_slug else ""
     if not slug:
-        if expected_slug:
-            slug = slugify(expected_slug)
-        else:
-            slug = slugify(theme_dir.name)
-    dir_slug = slugify(theme_dir.name)
+        slug = expected if expected_slug else dir_slug
     if require_directory_slug and metadata_slug and dir_slug and slug != dir_slug:
         errors.append(
             ThemeValidationIssue(
@@ -143,7 +160,6 @@ def validate_theme_dir(
         )
 
     if expected_slug:
-        expected = slugify(expected_slug)
         if metadata_slug and slug != expected:
             errors.append(
                 ThemeValidationIssue(
@@ -184,9 +200,10 @@ def validate_theme_dir(
                 )
             )
         elif isinstance(fields, dict):
+            errors_append = errors.append
             for field_name, field_def in fields.items():
                 if not isinstance(field_def, dict):
-                    errors.append(
+                    errors_append(
                         ThemeValidationIssue(
                             code="invalid_settings_field",
                             field=f"settings.fields.{field_name}",
@@ -196,17 +213,17 @@ def validate_theme_dir(
                     continue
                 field_type = field_def.get("type", "string")
                 if not isinstance(field_type, str) or field_type not in THEME_SETTINGS_FIELD_TYPES:
-                    errors.append(
+                    errors_append(
                         ThemeValidationIssue(
                             code="invalid_settings_field",
                             field=f"settings.fields.{field_name}.type",
                             message="Theme setting type is not supported.",
                         )
                     )
-                if field_type == "select":
+                elif field_type == "select":
                     choices = field_def.get("choices")
                     if choices is not None and not isinstance(choices, list):
-                        errors.append(
+                        errors_append(
                             ThemeValidationIssue(
                                 code="invalid_settings_field",
                                 field=f"settings.fields.{field_name}.choices",
@@ -214,8 +231,8 @@ def validate_theme_dir(
                             )
                         )
 
-    templates_dir = theme_dir / "templates"
-    if not templates_dir.exists() or not templates_dir.is_dir():
+    child_dirs = _child_dir_names(theme_dir)
+    if "templates" not in child_dirs:
         errors.append(
             ThemeValidationIssue(
                 code="missing_templates",
@@ -223,8 +240,7 @@ def validate_theme_dir(
             )
         )
 
-    static_dir = theme_dir / "static"
-    if require_static and (not static_dir.exists() or not static_dir.is_dir()):
+    if require_static and "static" not in child_dirs:
         errors.append(
             ThemeValidationIssue(
                 code="missing_static",
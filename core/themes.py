@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import copy
 import logging
+import os
 import shutil
 import subprocess
 import tempfile
 import time
 import zipfile
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from urllib.parse import urlsplit
-from typing import Any, Iterable, Optional, Sequence
+from typing import Any, Iterable, Iterator, Optional, Sequence
 from uuid import uuid4
 
 from django.core.files import File
@@ -102,14 +105,15 @@ def get_theme_storage() -> Storage:
     return default_storage
 
 
-def get_active_theme_settings() -> dict:
+def get_active_theme_settings(settings_obj=None) -> dict:
     """Return resolved settings for the active theme."""
-    active_theme = get_active_theme()
+    if settings_obj is None:
+        from .models import SiteConfiguration
+
+        settings_obj = SiteConfiguration.get_solo()
+    active_theme = get_active_theme(settings_obj)
     if not active_theme:
         return {}
-    from .models import SiteConfiguration
-
-    settings_obj = SiteConfiguration.get_solo()
     stored_settings = (
         settings_obj.theme_settings.get(active_theme.slug, {})
         if isinstance(settings_obj.theme_settings, dict)
@@ -118,8 +122,8 @@ def get_active_theme_settings() -> dict:
     return resolve_theme_settings(active_theme.settings_schema, stored_settings)
 
 
-def get_posts_index_url() -> str:
-    settings = get_active_theme_settings()
+def get_posts_index_url(theme_settings: Optional[dict] = None) -> str:
+    settings = get_active_theme_settings() if theme_settings is None else theme_settings
     if settings.get("home_feed_mode") == "home":
         return reverse("index")
     return reverse("posts")
@@ -518,33 +522,31 @@ def _replace_theme_on_disk(slug: str, source_dir: Path, *, base_dir: Optional[Pa
             shutil.rmtree(backup_dir, ignore_errors=True)
 
 
-def _extract_theme_archive(uploaded_path: Path) -> tuple[str, Path, dict]:
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        destination = Path(tmp_dir)
-        with zipfile.ZipFile(uploaded_path) as archive:
-            for member in archive.namelist():
-                _validate_safe_path(destination, destination / member)
-            archive.extractall(destination)
-
-        theme_root = _find_theme_root(destination)
-        validation = validate_theme_dir(
-            theme_root,
-            meta_filename=THEME_META_FILENAME,
-            require_directory_slug=theme_root != destination,
-        )
-        if not validation.is_valid:
-            raise ThemeUploadError(validation.summary())
-        metadata = validation.metadata
-
-        slug_source = validation.slug or uploaded_path.stem
-        slug = slugify(slug_source)
-        if not slug:
-            raise ThemeUploadError("Theme slug could not be determined from archive.")
+def _extract_theme_archive(uploaded_path: Path, destination: Path) -> tuple[str, Path, dict]:
+    """
+    Extract the archive into ``destination`` and return the slug, the theme
+    root inside it, and the theme metadata. The caller owns ``destination``.
+    """
+    with zipfile.ZipFile(uploaded_path) as archive:
+        for member in archive.namelist():
+            _validate_safe_path(destination, destination / member)
+        archive.extractall(destination)
+
+    theme_root = _find_theme_root(destination)
+    validation = validate_theme_dir(
+        theme_root,
+        meta_filename=THEME_META_FILENAME,
+        require_directory_slug=theme_root != destination,
+    )
+    if not validation.is_valid:
+        raise ThemeUploadError(validation.summary())
+    metadata = validation.metadata
 
-        # Copy the extracted folder to a stable temp directory the caller can consume.
-        final_tmp_dir = Path(tempfile.mkdtemp())
-        shutil.copytree(theme_root, final_tmp_dir, dirs_exist_ok=True)
-        return slug, final_tmp_dir, metadata
+    slug_source = validation.slug or uploaded_path.stem
+    slug = slugify(slug_source)
+    if not slug:
+        raise ThemeUploadError("Theme slug could not be determined from archive.")
+    return slug, theme_root, metadata
 
 
 def ingest_theme_archive(uploaded_file, *, base_dir: Optional[Path] = None) -> ThemeDefinition:
@@ -552,18 +554,23 @@ def ingest_theme_archive(uploaded_file, *, base_dir: Optional[Path] = None) -> T
     Process an uploaded zip archive, validate it, and persist it to storage + disk.
     """
     started_at = time.monotonic()
-    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp_file:
-        for chunk in uploaded_file.chunks():
-            tmp_file.write(chunk)
-        tmp_path = Path(tmp_file.name)
+    # Large uploads are already spooled to disk by Django; read those in place.
+    owns_tmp_path = not hasattr(uploaded_file, "temporary_file_path")
+    if owns_tmp_path:
+        with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp_file:
+            for chunk in uploaded_file.chunks():
+                tmp_file.write(chunk)
+            tmp_path = Path(tmp_file.name)
+    else:
+        tmp_path = Path(uploaded_file.temporary_file_path())
 
     slug: Optional[str] = None
-    extracted_dir: Optional[Path] = None
+    work_dir = Path(tempfile.mkdtemp())
     log_status = "success"
     log_error = ""
     try:
         try:
-            slug, extracted_dir, metadata = _extract_theme_archive(tmp_path)
+            slug, extracted_dir, metadata = _extract_theme_archive(tmp_path, work_dir)
         except zipfile.BadZipFile as exc:
             raise ThemeUploadError("Uploaded file must be a valid zip archive.") from exc
         except ThemeUploadError:
@@ -607,12 +614,12 @@ def ingest_theme_archive(uploaded_file, *, base_dir: Optional[Path] = None) -> T
             duration_ms_value=duration_ms(started_at),
             error=log_error,
         )
-        try:
-            tmp_path.unlink(missing_ok=True)
-        except Exception:
-            pass
-        if extracted_dir and extracted_dir.exists():
-            shutil.rmtree(extracted_dir, ignore_errors=True)
+        if owns_tmp_path:
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except Exception:
+                pass
+        shutil.rmtree(work_dir, ignore_errors=True)
 
     clear_template_caches()
     theme = get_theme(slug or "", base_dir=base_dir)
@@ -862,45 +869,60 @@ def update_theme_from_git(
         shutil.rmtree(clone_dir, ignore_errors=True)
 
 
-def list_theme_files(slug: str, *, base_dir: Optional[Path] = None, suffixes: Optional[Sequence[str]] = None) -> list[str]:
+def _walk_theme_tree(root: Path, prefix: str = "") -> Iterator[tuple[str, str, bool]]:
     """
-    Return a sorted list of file paths relative to the theme root.
-    Optionally filter by allowed suffixes.
+    Yield ``(relative_path, name, is_dir)`` for everything below ``root``.
+    Uses ``os.scandir`` so the file type comes from the directory entry
+    instead of an extra ``stat()`` per path.
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            relative = f"{prefix}{entry.name}"
+            is_dir = entry.is_dir()
+            yield relative, entry.name, is_dir
+            if is_dir and not entry.is_symlink():
+                yield from _walk_theme_tree(Path(entry.path), f"{relative}/")
+
+
+def list_theme_entries(
+    slug: str, *, base_dir: Optional[Path] = None, suffixes: Optional[Sequence[str]] = None
+) -> tuple[list[str], list[str]]:
+    """
+    Return sorted ``(files, directories)`` relative to the theme root from a
+    single walk of the theme tree. Files are optionally filtered by suffix.
     """
     ensure_theme_on_disk(slug, base_dir=base_dir)
     theme_root = get_themes_root(base_dir) / slug
     if not theme_root.exists():
-        return []
+        return [], []
 
-    normalized_suffixes = tuple(suffixes) if suffixes else None
-    results: list[str] = []
-    for path in theme_root.rglob("*"):
-        if path.is_dir():
-            continue
-        relative = path.relative_to(theme_root).as_posix()
-        if normalized_suffixes and path.suffix not in normalized_suffixes:
-            continue
-        results.append(relative)
+    suffix_set = frozenset(suffixes) if suffixes else None
+    files: list[str] = []
+    directories: list[str] = []
+    for relative, name, is_dir in _walk_theme_tree(theme_root):
+        if is_dir:
+            directories.append(relative)
+        elif suffix_set is None or os.path.splitext(name)[1] in suffix_set:
+            files.append(relative)
 
-    results.sort()
-    return results
+    files.sort()
+    directories.sort()
+    return files, directories
+
+
+def list_theme_files(slug: str, *, base_dir: Optional[Path] = None, suffixes: Optional[Sequence[str]] = None) -> list[str]:
+    """
+    Return a sorted list of file paths relative to the theme root.
+    Optionally filter by allowed suffixes.
+    """
+    files, _directories = list_theme_entries(slug, base_dir=base_dir, suffixes=suffixes)
+    return files
 
 
 def list_theme_directories(slug: str, *, base_dir: Optional[Path] = None) -> list[str]:
     """Return all directories (relative) under the theme, excluding the root."""
-    ensure_theme_on_disk(slug, base_dir=base_dir)
-    theme_root = get_themes_root(base_dir) / slug
-    if not theme_root.exists():
-        return []
-
-    results: list[str] = []
-    for path in theme_root.rglob("*"):
-        if path.is_dir():
-            relative = path.relative_to(theme_root).as_posix()
-            if relative:
-                results.append(relative)
-    results.sort()
-    return results
+    _files, directories = list_theme_entries(slug, base_dir=base_dir)
+    return directories
 
 
 def read_theme_file(slug: str, relative_path: str, *, base_dir: Optional[Path] = None) -> str:
@@ -1005,6 +1027,44 @@ def delete_theme_path(slug: str, relative_path: str, *, base_dir: Optional[Path]
     clear_template_caches()
 
 
+@lru_cache(maxsize=64)
+def _load_theme_definition(theme_dir: str, _meta_stamp: tuple[int, int]) -> ThemeDefinition:
+    # Keyed by the theme.json mtime and size so edits and reinstalls are picked up
+    # without re-parsing unchanged metadata on every lookup.
+    theme_path = Path(theme_dir)
+    metadata, _errors = load_theme_metadata(theme_path / THEME_META_FILENAME)
+    slug = theme_path.name
+    label = metadata.get("label") or slug.replace("-", " ").title()
+    settings_schema = _normalize_theme_settings_schema(metadata)
+    raw_areas = metadata.get("widget_areas", [])
+    widget_areas = [
+        a for a in raw_areas
+        if isinstance(a, dict) and a.get("slug") and a.get("label")
+    ]
+    return ThemeDefinition(
+        slug=slug,
+        path=theme_path,
+        label=label,
+        author=metadata.get("author"),
+        version=metadata.get("version"),
+        description=metadata.get("description"),
+        settings_schema=settings_schema,
+        widget_areas=widget_areas,
+        metadata=metadata,
+    )
+
+
+def _theme_definition(theme_dir: Path) -> Optional[ThemeDefinition]:
+    try:
+        meta_stat = (theme_dir / THEME_META_FILENAME).stat()
+    except OSError:
+        return None
+    # Hand out a copy so callers can't mutate the cached settings or metadata.
+    return copy.deepcopy(
+        _load_theme_definition(str(theme_dir), (meta_stat.st_mtime_ns, meta_stat.st_size))
+    )
+
+
 def discover_themes(base_dir: Optional[Path] = None) -> list[ThemeDefinition]:
     """Inspect the themes directory and return discovered themes."""
     themes_root = get_themes_root(base_dir)
@@ -1014,43 +1074,21 @@ def discover_themes(base_dir: Optional[Path] = None) -> list[ThemeDefinition]:
     for theme_dir in themes_root.iterdir():
         if not theme_dir.is_dir():
             continue
-
-        meta_path = theme_dir / THEME_META_FILENAME
-        if not meta_path.exists():
-            continue
-
-        metadata, _errors = load_theme_metadata(meta_path)
-        slug = theme_dir.name
-        label = metadata.get("label") or slug.replace("-", " ").title()
-        settings_schema = _normalize_theme_settings_schema(metadata)
-        raw_areas = metadata.get("widget_areas", [])
-        widget_areas = [
-            a for a in raw_areas
-            if isinstance(a, dict) and a.get("slug") and a.get("label")
-        ]
-        themes.append(
-            ThemeDefinition(
-                slug=slug,
-                path=theme_dir,
-                label=label,
-                author=metadata.get("author"),
-                version=metadata.get("version"),
-                description=metadata.get("description"),
-                settings_schema=settings_schema,
-                widget_areas=widget_areas,
-                metadata=metadata,
-            )
-        )
+        theme = _theme_definition(theme_dir)
+        if theme is not None:
+            themes.append(theme)
 
     themes.sort(key=lambda theme: theme.label.lower())
     return themes
 
 
 def get_theme(slug: str, *, base_dir: Optional[Path] = None) -> Optional[ThemeDefinition]:
-    for theme in discover_themes(base_dir=base_dir):
-        if theme.slug == slug:
-            return theme
-    return None
+    if not slug or slug in {".", ".."} or "/" in slug or "\\" in slug:
+        return None
+    theme_dir = get_themes_root(base_dir) / slug
+    if not theme_dir.is_dir():
+        return None
+    return _theme_definition(theme_dir)
 
 
 def _normalize_theme_settings_schema(metadata: dict) -> dict:
@@ -1097,7 +1135,9 @@ def get_theme_static_dirs(base_dir: Optional[Path] = None, *, sync: bool = False
             yield (f"{THEMES_DIRNAME}/{theme.slug}/static", static_dir)
 
 
-def get_active_theme_slug() -> str:
+def get_active_theme_slug(settings_obj=None) -> str:
+    if settings_obj is not None:
+        return settings_obj.active_theme or DEFAULT_THEME_SLUG
     try:
         from core.models import SiteConfiguration
 
@@ -1107,8 +1147,8 @@ def get_active_theme_slug() -> str:
         return DEFAULT_THEME_SLUG
 
 
-def get_active_theme() -> Optional[ThemeDefinition]:
-    slug = get_active_theme_slug()
+def get_active_theme(settings_obj=None) -> Optional[ThemeDefinition]:
+    slug = get_active_theme_slug(settings_obj)
     if not slug:
         return None
     return get_theme(slug)
@@ -1,6 +1,7 @@
 import markdown
 
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.templatetags.static import static
 from django.urls import reverse
@@ -11,15 +12,24 @@ from blog.models import Post, Tag
 from blog.views import build_posts_listing_context
 from core.themes import get_active_theme_settings
 
+SITEMAP_CACHE_KEY = "core:sitemap"
+# Content signals only clear the saving process's cache (no shared CACHES is
+# configured); other processes serve the old sitemap until this expires.
+SITEMAP_CACHE_TIMEOUT = 60 * 10
+SITEMAP_HEADER = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+)
+
 def index(request):
     recent_blog_posts = (
         Post.objects.filter(kind=Post.ARTICLE)
         .exclude(published_on__isnull=True)
         .order_by("-published_on")[:5]
     )
-    settings_obj = SiteConfiguration.get_solo()
+    settings_obj = SiteConfiguration.for_request(request)
     home_page = settings_obj.home_page if settings_obj.home_page_id else None
-    theme_settings = get_active_theme_settings()
+    theme_settings = get_active_theme_settings(settings_obj)
     home_feed_mode = theme_settings.get("home_feed_mode", "blog")
     feed_context = {}
     if home_feed_mode == "home":
@@ -63,18 +73,51 @@ def page(request, slug):
 
 
 def robots_txt(request):
-    config = SiteConfiguration.get_solo()
+    config = SiteConfiguration.for_request(request)
     return HttpResponse(config.robots_txt, content_type="text/plain")
 
 
 def favicon(request):
-    config = SiteConfiguration.get_solo()
+    config = SiteConfiguration.for_request(request)
     if config.favicon_id and config.favicon and config.favicon.file:
         return redirect(config.favicon.file.url)
     return redirect(static("favicon.svg"))
 
 
+def invalidate_sitemap():
+    cache.delete(SITEMAP_CACHE_KEY)
+
+
 def sitemap(request):
+    # One cache entry holds the rendered XML per site root (scheme + host), so
+    # invalidating on content changes is a single delete.
+    site_root = request.build_absolute_uri("/")
+    cached = cache.get(SITEMAP_CACHE_KEY) or {}
+    if site_root in cached:
+        return HttpResponse(cached[site_root], content_type="application/xml")
+
+    return StreamingHttpResponse(
+        _stream_and_cache_sitemap(request, site_root),
+        content_type="application/xml",
+    )
+
+
+def _stream_and_cache_sitemap(request, site_root):
+    chunks = []
+    for chunk in _stream_sitemap(request):
+        chunks.append(chunk)
+        yield chunk
+    # Only a fully sent document is cached; an aborted stream stops above.
+    cached = cache.get(SITEMAP_CACHE_KEY) or {}
+    cached[site_root] = b"".join(chunks)
+    cache.set(SITEMAP_CACHE_KEY, cached, SITEMAP_CACHE_TIMEOUT)
+
+
+def _sitemap_entry(url: str) -> bytes:
+    return b"\n  <url>\n    <loc>" + url.encode() + b"</loc>\n  </url>"
+
+
+def _stream_sitemap(request):
     theme_settings = get_active_theme_settings()
     home_feed_mode = theme_settings.get("home_feed_mode", "blog")
     home_feed_redirect = theme_settings.get("home_feed_redirect")
@@ -91,38 +134,39 @@ def sitemap(request):
     if not (home_feed_mode == "home" and home_feed_redirect):
         static_route_names.insert(1, "posts")
 
-    urls = set()
+    static_urls = set()
     for name in static_route_names:
         try:
             path = reverse(name)
         except Exception:
             continue
-        urls.add(request.build_absolute_uri(path))
-
-    pages = Page.objects.all()
-    posts = Post.objects.exclude(published_on__isnull=True).filter(deleted=False)
-    tags = Tag.objects.all()
-
-    for page in pages:
-        urls.add(request.build_absolute_uri(reverse("page", kwargs={"slug": page.slug})))
+        static_urls.add(request.build_absolute_uri(path))
+
+    yield SITEMAP_HEADER
+    for url in sorted(static_urls):
+        yield _sitemap_entry(url)
+
+    # Slugs and tags are unique and each kind has its own URL prefix, so the
+    # rows can be streamed in SQL order without a dedupe set.
+    page_slugs = Page.objects.order_by("slug").values_list("slug", flat=True)
+    post_slugs = (
+        Post.objects.exclude(published_on__isnull=True)
+        .filter(deleted=False)
+        .order_by("slug")
+        .values_list("slug", flat=True)
+    )
+    tag_names = Tag.objects.order_by("tag").values_list("tag", flat=True)
 
-    for post in posts:
-        urls.add(request.build_absolute_uri(post.get_absolute_url()))
+    for slug in page_slugs.iterator(chunk_size=500):
+        yield _sitemap_entry(request.build_absolute_uri(reverse("page", kwargs={"slug": slug})))
 
-    for tag in tags:
-        urls.add(request.build_absolute_uri(reverse("posts_by_tag", kwargs={"tag": tag.tag})))
+    for slug in post_slugs.iterator(chunk_size=500):
+        yield _sitemap_entry(request.build_absolute_uri(reverse("post", kwargs={"slug": slug})))
 
-    xml_lines = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
-    ]
-    for url in sorted(urls):
-        xml_lines.append("  <url>")
-        xml_lines.append(f"    <loc>{url}</loc>")
-        xml_lines.append("  </url>")
-    xml_lines.append("</urlset>")
+    for tag in tag_names.iterator(chunk_size=500):
+        yield _sitemap_entry(request.build_absolute_uri(reverse("posts_by_tag", kwargs={"tag": tag})))
 
-    return HttpResponse("\n".join(xml_lines), content_type="application/xml")
+    yield b"\n</urlset>"
 
 
 def healthz(request):
@@ -1,13 +1,37 @@
+from functools import lru_cache
+
 from django import forms
 from django.templatetags.static import static
 
 
+@lru_cache(maxsize=None)
+def _editor_media(css: tuple[str, ...], js: tuple[str, ...], init_script: str) -> forms.Media:
+    # Built once per widget class; Media addition returns new objects, so the
+    # shared instance is never mutated by form media merging.
+    return forms.Media(css={"all": css}, js=(*js, static(init_script)))
+
+
 class CodeMirrorTextarea(forms.Textarea):
     """Textarea widget that upgrades to a CodeMirror editor in the admin.
 
     Used for the theme editor where syntax highlighting for HTML/CSS/JS is needed.
     """
 
+    _CDN_BASE = "https://cdnjs.cloudflare.com/ajax/libs/codemirror/5.65.16"
+    _CSS = (
+        f"{_CDN_BASE}/codemirror.min.css",
+        f"{_CDN_BASE}/theme/material.min.css",
+    )
+    _JS = (
+        f"{_CDN_BASE}/codemirror.min.js",
+        f"{_CDN_BASE}/mode/markdown/markdown.min.js",
+        f"{_CDN_BASE}/addon/edit/closebrackets.min.js",
+        f"{_CDN_BASE}/addon/edit/closetag.min.js",
+        f"{_CDN_BASE}/addon/edit/matchbrackets.min.js",
+        f"{_CDN_BASE}/addon/display/placeholder.min.js",
+    )
+    _INIT_SCRIPT = "core/js/codemirror-init.js"
+
     def __init__(self, *args, mode="markdown", dark_mode="auto", **kwargs):
         attrs = kwargs.setdefault("attrs", {})
         existing_classes = attrs.get("class", "")
@@ -21,28 +45,16 @@ class CodeMirrorTextarea(forms.Textarea):
 
     @property
     def media(self):
-        cdn_base = "https://cdnjs.cloudflare.com/ajax/libs/codemirror/5.65.16"
-        css = {
-            "all": (
-                f"{cdn_base}/codemirror.min.css",
-                f"{cdn_base}/theme/material.min.css",
-            )
-        }
-        js = (
-            f"{cdn_base}/codemirror.min.js",
-            f"{cdn_base}/mode/markdown/markdown.min.js",
-            f"{cdn_base}/addon/edit/closebrackets.min.js",
-            f"{cdn_base}/addon/edit/closetag.min.js",
-            f"{cdn_base}/addon/edit/matchbrackets.min.js",
-            f"{cdn_base}/addon/display/placeholder.min.js",
-            static("core/js/codemirror-init.js"),
-        )
-        return forms.Media(css=css, js=js)
+        return _editor_media(self._CSS, self._JS, self._INIT_SCRIPT)
 
 
 class EasyMDETextarea(forms.Textarea):
     """Textarea widget that upgrades to an EasyMDE Markdown editor."""
 
+    _CSS = ("https://cdn.jsdelivr.net/npm/easymde@2.18.0/dist/easymde.min.css",)
+    _JS = ("https://cdn.jsdelivr.net/npm/easymde@2.18.0/dist/easymde.min.js",)
+    _INIT_SCRIPT = "core/js/easymde-init.js"
+
     def __init__(self, *args, **kwargs):
         attrs = kwargs.setdefault("attrs", {})
         attrs["data-easymde"] = "true"
@@ -55,14 +67,4 @@ class EasyMDETextarea(forms.Textarea):
 
     @property
     def media(self):
-        return forms.Media(
-            css={
-                "all": (
-                    "https://cdn.jsdelivr.net/npm/easymde@2.18.0/dist/easymde.min.css",
-                )
-            },
-            js=(
-                "https://cdn.jsdelivr.net/npm/easymde@2.18.0/dist/easymde.min.js",
-                static("core/js/easymde-init.js"),
-            ),
-        )
+        return _editor_media(self._CSS, self._JS, self._INIT_SCRIPT)
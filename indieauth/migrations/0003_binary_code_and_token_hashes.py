@@ -0,0 +1,80 @@
+from django.db import migrations, models
+
+
+HASHED_MODELS = (
+    ("IndieAuthAuthorizationCode", "code_hash"),
+    ("IndieAuthAccessToken", "token_hash"),
+)
+
+
+def hex_to_bytes(apps, schema_editor):
+    for model_name, field in HASHED_MODELS:
+        model = apps.get_model("indieauth", model_name)
+        for pk, hex_value in model.objects.values_list("pk", f"{field}_hex").iterator():
+            model.objects.filter(pk=pk).update(**{field: bytes.fromhex(hex_value)})
+
+
+def bytes_to_hex(apps, schema_editor):
+    for model_name, field in HASHED_MODELS:
+        model = apps.get_model("indieauth", model_name)
+        for pk, raw_value in model.objects.values_list("pk", field).iterator():
+            model.objects.filter(pk=pk).update(**{f"{field}_hex": bytes(raw_value).hex()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("indieauth", "0002_indieauthrequestlog"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="indieauthaccesstoken",
+            old_name="token_hash",
+            new_name="token_hash_hex",
+        ),
+        migrations.RenameField(
+            model_name="indieauthauthorizationcode",
+            old_name="code_hash",
+            new_name="code_hash_hex",
+        ),
+        migrations.AlterField(
+            model_name="indieauthaccesstoken",
+            name="token_hash_hex",
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name="indieauthauthorizationcode",
+            name="code_hash_hex",
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="indieauthaccesstoken",
+            name="token_hash",
+            field=models.BinaryField(max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name="indieauthauthorizationcode",
+            name="code_hash",
+            field=models.BinaryField(max_length=32, null=True),
+        ),
+        migrations.RunPython(hex_to_bytes, bytes_to_hex),
+        migrations.RemoveField(
+            model_name="indieauthaccesstoken",
+            name="token_hash_hex",
+        ),
+        migrations.RemoveField(
+            model_name="indieauthauthorizationcode",
+            name="code_hash_hex",
+        ),
+        migrations.AlterField(
+            model_name="indieauthaccesstoken",
+            name="token_hash",
+            field=models.BinaryField(max_length=32, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="indieauthauthorizationcode",
+            name="code_hash",
+            field=models.BinaryField(max_length=32, unique=True),
+        ),
+    ]
@@ -15,7 +15,7 @@ class IndieAuthClient(models.Model):
 
 
 class IndieAuthAuthorizationCode(models.Model):
-    code_hash = models.CharField(max_length=64, unique=True)
+    code_hash = models.BinaryField(max_length=32, unique=True)
     code_challenge = models.CharField(max_length=255)
     code_challenge_method = models.CharField(max_length=32, default="S256")
     client_id = models.URLField(max_length=2000)
@@ -32,7 +32,7 @@ class IndieAuthAuthorizationCode(models.Model):
 
 
 class IndieAuthAccessToken(models.Model):
-    token_hash = models.CharField(max_length=64, unique=True)
+    token_hash = models.BinaryField(max_length=32, unique=True)
     client_id = models.URLField(max_length=2000)
     me = models.URLField(max_length=2000)
     scope = models.TextField(blank=True, default="")
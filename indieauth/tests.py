@@ -1,10 +1,13 @@
 import base64
 import hashlib
+import json
+from functools import lru_cache
 from urllib.parse import parse_qs, urlparse
 from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
 from django.urls import reverse
 from django.utils import timezone
 
@@ -12,6 +15,7 @@ from .models import IndieAuthAccessToken, IndieAuthAuthorizationCode, IndieAuthC
 from . import views
 
 
+@lru_cache(maxsize=None)
 def _code_challenge(verifier: str) -> str:
     digest = hashlib.sha256(verifier.encode("utf-8")).digest()
     return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
@@ -28,20 +32,35 @@ class IndieAuthMetadataTests(TestCase):
             self.assertIn("issuer", payload)
 
 
+# PBKDF2 is deliberately slow; tests only need a password that verifies.
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
 class IndieAuthFlowTests(TestCase):
-    def setUp(self):
-        super().setUp()
-        self.user = get_user_model().objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
             username="author",
             email="author@example.com",
             password="pass1234",
         )
-        self.client_id = "https://client.example"
-        self.redirect_uri = "https://client.example/callback"
+        cls.client_id = "https://client.example"
+        cls.redirect_uri = "https://client.example/callback"
         IndieAuthClient.objects.create(
-            client_id=self.client_id,
+            client_id=cls.client_id,
             name="Client App",
-            redirect_uris=[self.redirect_uri],
+            redirect_uris=[cls.redirect_uri],
+        )
+
+    def _authorization_code(self, code, verifier, expires_at):
+        return IndieAuthAuthorizationCode(
+            code_hash=hashlib.sha256(code.encode("utf-8")).digest(),
+            code_challenge=_code_challenge(verifier),
+            code_challenge_method="S256",
+            client_id=self.client_id,
+            redirect_uri=self.redirect_uri,
+            me="http://testserver/",
+            scope="create",
+            user=self.user,
+            expires_at=expires_at,
         )
 
     def _authorize_url(self, **overrides):
@@ -107,16 +126,13 @@ class IndieAuthFlowTests(TestCase):
 
     def test_code_single_use_and_expiry(self):
         code = "code123"
-        IndieAuthAuthorizationCode.objects.create(
-            code_hash=hashlib.sha256(code.encode("utf-8")).hexdigest(),
-            code_challenge=_code_challenge("verifier123"),
-            code_challenge_method="S256",
-            client_id=self.client_id,
-            redirect_uri=self.redirect_uri,
-            me="http://testserver/",
-            scope="create",
-            user=self.user,
-            expires_at=timezone.now() - timezone.timedelta(minutes=1),
+        fresh_code = "code456"
+        now = timezone.now()
+        IndieAuthAuthorizationCode.objects.bulk_create(
+            [
+                self._authorization_code(code, "verifier123", now - timezone.timedelta(minutes=1)),
+                self._authorization_code(fresh_code, "verifier456", now + timezone.timedelta(minutes=5)),
+            ]
         )
         response = self.client.post(
             reverse("indieauth-token"),
@@ -130,18 +146,6 @@ class IndieAuthFlowTests(TestCase):
         )
         self.assertEqual(response.status_code, 400)
 
-        fresh_code = "code456"
-        IndieAuthAuthorizationCode.objects.create(
-            code_hash=hashlib.sha256(fresh_code.encode("utf-8")).hexdigest(),
-            code_challenge=_code_challenge("verifier456"),
-            code_challenge_method="S256",
-            client_id=self.client_id,
-            redirect_uri=self.redirect_uri,
-            me="http://testserver/",
-            scope="create",
-            user=self.user,
-            expires_at=timezone.now() + timezone.timedelta(minutes=5),
-        )
         good_response = self.client.post(
             reverse("indieauth-token"),
             {
@@ -169,7 +173,7 @@ class IndieAuthFlowTests(TestCase):
     def test_introspection_and_revocation(self):
         token_value = "token123"
         IndieAuthAccessToken.objects.create(
-            token_hash=hashlib.sha256(token_value.encode("utf-8")).hexdigest(),
+            token_hash=hashlib.sha256(token_value.encode("utf-8")).digest(),
             client_id=self.client_id,
             me="http://testserver/",
             scope="read",
@@ -192,6 +196,44 @@ class IndieAuthFlowTests(TestCase):
         self.assertFalse(inactive_response.json()["active"])
 
 
+    def test_userinfo_rejects_revoked_token(self):
+        now = timezone.now()
+        IndieAuthAccessToken.objects.bulk_create(
+            [
+                IndieAuthAccessToken(
+                    token_hash=hashlib.sha256(value.encode("utf-8")).digest(),
+                    client_id=self.client_id,
+                    me="http://testserver/",
+                    scope="profile",
+                    user=self.user,
+                    revoked_at=revoked_at,
+                )
+                for value, revoked_at in (("active-token", None), ("revoked-token", now))
+            ]
+        )
+
+        active = self.client.get(reverse("indieauth-userinfo"), HTTP_AUTHORIZATION="Bearer active-token")
+        revoked = self.client.get(reverse("indieauth-userinfo"), HTTP_AUTHORIZATION="Bearer revoked-token")
+
+        self.assertEqual(active.status_code, 200)
+        self.assertEqual(active.json()["name"], "author")
+        self.assertEqual(revoked.status_code, 401)
+
+    def test_userinfo_loads_token_and_user_in_one_query(self):
+        IndieAuthAccessToken.objects.create(
+            token_hash=hashlib.sha256(b"profile-token").digest(),
+            client_id=self.client_id,
+            me="http://testserver/",
+            scope="profile",
+            user=self.user,
+        )
+        request = RequestFactory().get("/indieauth/userinfo", HTTP_AUTHORIZATION="Bearer profile-token")
+
+        with self.assertNumQueries(1):
+            response = views.userinfo(request)
+
+        self.assertEqual(json.loads(response.content), {"me": "http://testserver/", "name": "author", "email": "author@example.com"})
+
 class IndieAuthSecurityTests(TestCase):
     def test_redirect_uri_path_boundary(self):
         # Directory-style client_id: redirect must be under that directory.
@@ -223,6 +265,12 @@ class IndieAuthSecurityTests(TestCase):
             views._redirect_uri_allowed(root_client_id, "https://evil.example/callback", None)
         )
 
+    def test_pkce_s256_matches_rfc7636_example(self):
+        verifier = "dBjftJeZ4CVP-mB92K27uhbUJU1p1r_wW1gFWFOEjXk"
+
+        self.assertEqual(views._base64url_sha256(verifier), "E9Melhoa2OwvFrEMTJguCHaoeK1t8URWbuGJSstw-cM")
+        self.assertEqual(views._base64url_sha256("other"), _code_challenge("other"))
+
     def test_client_metadata_blocks_private_hosts(self):
         with mock.patch("indieauth.views._resolve_host_ips", return_value={"127.0.0.1"}):
             with self.assertRaises(ValueError):
@@ -257,3 +305,4 @@ class IndieAuthSecurityTests(TestCase):
         ):
             with self.assertRaises(ValueError):
                 views._fetch_client_metadata("https://client.example")
+
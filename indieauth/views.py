@@ -32,15 +32,17 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
-INDIEAUTH_REDACT_FIELDS = {
-    "access_token",
-    "refresh_token",
-    "client_secret",
-    "code",
-    "code_verifier",
-    "code_challenge",
-    "token",
-}
+INDIEAUTH_REDACT_FIELDS = frozenset(
+    {
+        "access_token",
+        "refresh_token",
+        "client_secret",
+        "code",
+        "code_verifier",
+        "code_challenge",
+        "token",
+    }
+)
 
 AUTH_CODE_TTL = timedelta(minutes=10)
 ACCESS_TOKEN_TTL = timedelta(days=30)
@@ -98,8 +100,8 @@ class _ClientMetadataParser(HTMLParser):
             self.title = (data or "").strip()
 
 
-def _hash_token(value: str) -> str:
-    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+def _hash_token(value: str) -> bytes:
+    return hashlib.sha256(value.encode("utf-8")).digest()
 
 
 def _issuer(request) -> str:
@@ -215,7 +217,8 @@ def _redirect_with_params(base_url: str, params: dict) -> str:
 
 def _base64url_sha256(value: str) -> str:
     digest = hashlib.sha256(value.encode("utf-8")).digest()
-    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+    # A 32-byte digest always encodes to 44 characters ending in one "=".
+    return base64.urlsafe_b64encode(digest)[:-1].decode("ascii")
 
 
 def _parse_link_header(header_value: str, rel_name: str) -> list[str]:
@@ -718,7 +721,7 @@ def token(request):
             client_id=auth_code.client_id,
             me=auth_code.me,
             scope=auth_code.scope,
-            user=auth_code.user,
+            user_id=auth_code.user_id,
             expires_at=expires_at,
         )
 
@@ -751,13 +754,10 @@ def introspect(request):
         return response
 
     token_hash = _hash_token(token_value)
-    token = IndieAuthAccessToken.objects.filter(token_hash=token_hash).first()
+    token = IndieAuthAccessToken.objects.filter(token_hash=token_hash, revoked_at__isnull=True).first()
     if not token:
         return JsonResponse({"active": False})
 
-    if token.revoked_at:
-        return JsonResponse({"active": False})
-
     if token.expires_at and token.expires_at <= timezone.now():
         return JsonResponse({"active": False})
 
@@ -783,8 +783,12 @@ def userinfo(request):
         return response
     token_value = auth_header[7:].strip()
     token_hash = _hash_token(token_value)
-    token = IndieAuthAccessToken.objects.filter(token_hash=token_hash).first()
-    if not token or token.revoked_at:
+    token = (
+        IndieAuthAccessToken.objects.select_related("user")
+        .filter(token_hash=token_hash, revoked_at__isnull=True)
+        .first()
+    )
+    if not token:
         response = JsonResponse({"error": "unauthorized"}, status=401)
         _log_indieauth_error(request, response)
         return response
@@ -811,8 +815,8 @@ def _verify_access_token(request, token_value: str):
         return response
 
     token_hash = _hash_token(token_value)
-    token = IndieAuthAccessToken.objects.filter(token_hash=token_hash).first()
-    if not token or token.revoked_at:
+    token = IndieAuthAccessToken.objects.filter(token_hash=token_hash, revoked_at__isnull=True).first()
+    if not token:
         return JsonResponse({"active": False})
 
     if token.expires_at and token.expires_at <= timezone.now():
@@ -102,6 +102,24 @@ def send_single_webmention(self, post_id: int, source_url: str, target_url: str,
         close_old_connections()
 
 
+@shared_task
+def resend_single_webmention(webmention_id: int) -> None:
+    from django.db import close_old_connections
+    from micropub.models import Webmention
+    from micropub.webmention import resend_webmention
+
+    # As in analytics.tasks.lookup_user_agent: the Celery fixup handles the
+    # connection check before the task, so only close afterwards.
+    try:
+        try:
+            wm = Webmention.objects.get(id=webmention_id)
+        except Webmention.DoesNotExist:
+            return
+        resend_webmention(wm)
+    finally:
+        close_old_connections()
+
+
 @shared_task
 def dispatch_webmentions(post_id: int, source_url: str, *, include_bridgy: bool = False) -> None:
     import urllib.parse
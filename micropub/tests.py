@@ -4,6 +4,7 @@ from urllib.parse import parse_qs, urlparse
 from unittest.mock import patch, MagicMock
 from types import SimpleNamespace
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.urls import reverse
@@ -727,6 +728,27 @@ class VerifyWebmentionSourceTests(TestCase):
         self.assertTrue(fetch_failed)  # fetch_failed=True → stays PENDING
 
 
+class OutgoingWebmentionSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("micropub.webmention._SESSION")
+    def test_discovered_endpoint_is_reused_for_later_sends(self, session):
+        discovery = MagicMock()
+        discovery.headers = {"Link": '<https://brid.gy/publish/webmention>; rel="webmention"'}
+        session.get.return_value.__enter__.return_value = discovery
+        session.post.return_value = MagicMock(status_code=201, content=b"")
+
+        first = send_webmention("https://example.com/one/", "https://brid.gy/publish/bluesky")
+        second = send_webmention("https://example.com/two/", "https://brid.gy/publish/bluesky")
+
+        self.assertEqual(first.status, Webmention.ACCEPTED)
+        self.assertEqual(second.status, Webmention.ACCEPTED)
+        session.get.assert_called_once()
+        self.assertEqual(session.post.call_count, 2)
+        self.assertEqual(session.post.call_args.args[0], "https://brid.gy/publish/webmention")
+
+
 class WmPropertyRetryTests(TestCase):
     """Tests for the wm-property retry logic in send_webmention / resend_webmention."""
 
@@ -211,7 +211,7 @@ def _has_token_conflict(request):
     return len(set(tokens)) > 1
 
 
-MICROPUB_REDACT_FIELDS = {"access_token", "refresh_token", "client_secret"}
+MICROPUB_REDACT_FIELDS = frozenset({"access_token", "refresh_token", "client_secret"})
 
 
 def _log_micropub_error(request, response):
@@ -830,11 +830,9 @@ def _introspect_local(token: str) -> tuple[bool, list[str]] | None:
         return None
 
     token_hash = _hash_token(token)
-    token_obj = IndieAuthAccessToken.objects.filter(token_hash=token_hash).first()
+    token_obj = IndieAuthAccessToken.objects.filter(token_hash=token_hash, revoked_at__isnull=True).first()
     if not token_obj:
         return False, []
-    if token_obj.revoked_at:
-        return False, []
     if token_obj.expires_at and token_obj.expires_at <= timezone.now():
         return False, []
     scopes = _parse_scope(token_obj.scope)
@@ -7,7 +7,9 @@ import urllib.request
 from html.parser import HTMLParser
 from typing import Iterable, Optional
 
+import requests
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.encoding import force_str
 
 from blog.models import Post
@@ -15,6 +17,15 @@ from .models import Webmention
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = "django-blog-webmention"
+ENDPOINT_CACHE_TIMEOUT = 60 * 10
+
+# Outgoing webmentions (including Bridgy Publish) usually discover and POST to
+# the same host, so a shared session lets the send reuse the discovery's
+# keep-alive TLS connection.
+_SESSION = requests.Session()
+_SESSION.headers["User-Agent"] = USER_AGENT
+
 BRIDGY_PUBLISH_TARGETS = (
     ("bridgy_publish_bluesky", "https://brid.gy/publish/bluesky"),
     ("bridgy_publish_flickr", "https://brid.gy/publish/flickr"),
@@ -85,9 +96,20 @@ def _normalize_url_for_compare(url: str) -> str:
 
 
 def discover_webmention_endpoint(target_url: str) -> Optional[str]:
-    request = urllib.request.Request(target_url, headers={"User-Agent": "django-blog-webmention"})
+    cache_key = f"webmention:endpoint:{target_url}"
+    endpoint = cache.get(cache_key)
+    if endpoint:
+        return endpoint
+    endpoint = _discover_webmention_endpoint(target_url)
+    if endpoint:
+        cache.set(cache_key, endpoint, timeout=ENDPOINT_CACHE_TIMEOUT)
+    return endpoint
+
+
+def _discover_webmention_endpoint(target_url: str) -> Optional[str]:
     try:
-        with urllib.request.urlopen(request, timeout=10) as response:
+        with _SESSION.get(target_url, timeout=10, stream=True) as response:
+            response.raise_for_status()
             link_header = response.headers.get("Link")
             if link_header:
                 endpoint = _parse_link_header(link_header)
@@ -98,8 +120,8 @@ def discover_webmention_endpoint(target_url: str) -> Optional[str]:
             if "html" not in content_type:
                 return None
 
-            body = force_str(response.read(), errors="ignore")
-    except (urllib.error.HTTPError, urllib.error.URLError, ValueError):
+            body = force_str(response.content, errors="ignore")
+    except (requests.RequestException, ValueError):
         return None
 
     parser = _WebmentionDiscoveryParser()
@@ -114,7 +136,7 @@ def verify_webmention_source(source_url: str, target_url: str) -> tuple[bool, st
     if parsed_source.scheme not in ("http", "https"):
         return False, "Unsupported source scheme", False
 
-    request = urllib.request.Request(source_url, headers={"User-Agent": "django-blog-webmention"})
+    request = urllib.request.Request(source_url, headers={"User-Agent": USER_AGENT})
     try:
         with urllib.request.urlopen(request, timeout=10) as response:
             content_type = response.headers.get("Content-Type", "")
@@ -191,42 +213,20 @@ def _send_webmention_request(
     params = {"source": source_url, "target": target_url}
     if include_wm_property:
         params["wm-property"] = mention_type
-    data = urllib.parse.urlencode(params).encode()
-    send_request = urllib.request.Request(
-        endpoint,
-        data=data,
-        headers={"Content-Type": "application/x-www-form-urlencoded", "User-Agent": "django-blog-webmention"},
-        method="POST",
-    )
     try:
-        with urllib.request.urlopen(send_request, timeout=10) as response:
-            body = response.read()
-            body_preview = body[:2000].decode("utf-8", errors="replace") if body else ""
-            logger.info(
-                "Webmention response received",
-                extra={
-                    "webmention_source": source_url,
-                    "webmention_target": target_url,
-                    "webmention_endpoint": endpoint,
-                    "webmention_status": response.status,
-                    "webmention_body": body_preview,
-                },
-            )
-            if response.status == 202:
-                return Webmention.PENDING, ""
-            if response.status in (200, 201):
-                return Webmention.ACCEPTED, ""
-            return Webmention.REJECTED, f"Unexpected status {response.status}"
-    except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError, socket.timeout, ValueError) as exc:
-        error_status = getattr(exc, "code", None)
+        response = _SESSION.post(endpoint, data=params, timeout=10)
+        response.raise_for_status()
+    except (requests.RequestException, ValueError) as exc:
+        error_response = getattr(exc, "response", None)
+        error_status = getattr(error_response, "status_code", None)
         error_body = ""
-        if isinstance(exc, urllib.error.HTTPError):
+        if error_response is not None:
             try:
-                error_body = exc.read().decode("utf-8", errors="replace")
+                error_body = error_response.text
             except Exception:
                 error_body = ""
         status = Webmention.REJECTED
-        if isinstance(exc, (TimeoutError, socket.timeout)):
+        if isinstance(exc, requests.Timeout):
             status = Webmention.TIMED_OUT
         if not settings.RUNNING_TESTS:
             logger.info(
@@ -242,6 +242,24 @@ def _send_webmention_request(
             )
         return status, str(exc)
 
+    body = response.content
+    body_preview = body[:2000].decode("utf-8", errors="replace") if body else ""
+    logger.info(
+        "Webmention response received",
+        extra={
+            "webmention_source": source_url,
+            "webmention_target": target_url,
+            "webmention_endpoint": endpoint,
+            "webmention_status": response.status_code,
+            "webmention_body": body_preview,
+        },
+    )
+    if response.status_code == 202:
+        return Webmention.PENDING, ""
+    if response.status_code in (200, 201):
+        return Webmention.ACCEPTED, ""
+    return Webmention.REJECTED, f"Unexpected status {response.status_code}"
+
 
 def send_webmention(
     source_url: str,
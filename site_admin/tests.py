@@ -29,6 +29,7 @@ from core.models import (
     SiteConfiguration,
     ThemeInstall,
 )
+from core import themes
 from core.themes import ThemeDefinition, ThemeUpdateResult
 from core.test_utils import build_test_theme
 from files.models import Attachment, File
@@ -1126,6 +1127,24 @@ class SiteAdminThemeFileTests(TestCase):
                     (Path(themes_root) / "demo" / "templates" / "bad.exe").exists()
                 )
 
+    def test_theme_file_edit_walks_theme_once_per_request(self):
+        self.client.force_login(self.staff)
+        with tempfile.TemporaryDirectory() as themes_root:
+            with override_settings(THEMES_ROOT=themes_root):
+                build_test_theme("demo", themes_root)
+                with mock.patch(
+                    "site_admin.views.discover_themes", wraps=themes.discover_themes
+                ) as discover, mock.patch(
+                    "site_admin.views.list_theme_entries", wraps=themes.list_theme_entries
+                ) as list_entries:
+                    response = self.client.get(
+                        reverse("site_admin:theme_file_edit", kwargs={"slug": "demo"})
+                    )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(discover.call_count, 1)
+        self.assertEqual(list_entries.call_count, 1)
+
 
 class SiteAdminThemeInstallTests(TestCase):
     def setUp(self):
@@ -1151,6 +1170,30 @@ class SiteAdminThemeInstallTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.context["git_form"].errors)
 
+    def test_theme_inventory_search_only_counts_matching_themes(self):
+        self.client.force_login(self.staff)
+        with tempfile.TemporaryDirectory() as themes_root:
+            with override_settings(THEMES_ROOT=themes_root):
+                build_test_theme("alpha", themes_root)
+                build_test_theme("beta", themes_root)
+                ThemeInstall.objects.create(
+                    slug="beta",
+                    source_type=ThemeInstall.SOURCE_GIT,
+                    source_url="https://example.com/beta.git",
+                )
+                with mock.patch(
+                    "site_admin.views.list_theme_entries", wraps=themes.list_theme_entries
+                ) as list_entries:
+                    response = self.client.get(
+                        reverse("site_admin:theme_settings"), {"q": "example.com/BETA"}
+                    )
+
+        self.assertEqual(response.status_code, 200)
+        rows = response.context["inventory_rows"]
+        self.assertEqual([row["slug"] for row in rows], ["beta"])
+        self.assertEqual(rows[0]["file_count"], 3)
+        self.assertEqual([c.args[0] for c in list_entries.call_args_list], ["beta"])
+
     def test_theme_install_from_git_invokes_helper(self):
         self.client.force_login(self.staff)
         theme = ThemeDefinition(slug="demo", path=Path("/tmp/demo"), label="Demo")
@@ -1310,6 +1353,23 @@ class SiteAdminWebmentionModerationTests(TestCase):
         self.assertEqual(response.request["PATH_INFO"], reverse("site_admin:webmention_list"))
         self.assertContains(response, "Webmention deleted.")
 
+    def test_resend_outgoing_webmention_is_queued(self):
+        mention = Webmention.objects.create(
+            source="http://testserver/blog/post/hello/",
+            target="https://external.example/post/1/",
+            status=Webmention.TIMED_OUT,
+            is_incoming=False,
+        )
+        with mock.patch("site_admin.views.resend_single_webmention.delay") as delay_mock:
+            response = self.client.post(
+                reverse("site_admin:webmention_resend", kwargs={"mention_id": mention.id}),
+                follow=True,
+            )
+
+        self.assertEqual(response.status_code, 200)
+        delay_mock.assert_called_once_with(mention.id)
+        self.assertContains(response, "Webmention resend queued.")
+
 
 class SiteAdminCommentModerationTests(TestCase):
     def setUp(self):
@@ -1455,6 +1515,31 @@ class SiteAdminErrorLogTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(list(response.context["page_obj"].object_list)[:2], [newer_log, older_log])
 
+    def test_error_log_list_defers_payload_columns(self):
+        self.client.force_login(self.staff)
+        settings_obj = SiteConfiguration.get_solo()
+        settings_obj.developer_tools_enabled = True
+        settings_obj.save()
+        RequestErrorLog.objects.create(
+            source=RequestErrorLog.SOURCE_MICROPUB,
+            method="POST",
+            path="/micropub",
+            status_code=400,
+            error="invalid_request",
+            request_headers={"User-Agent": "client"},
+            request_query={},
+            request_body="x" * 5000,
+            response_body="",
+        )
+
+        response = self.client.get(reverse("site_admin:error_log_list"))
+
+        self.assertContains(response, "invalid_request")
+        log = response.context["page_obj"].object_list[0]
+        self.assertTrue(
+            {"request_headers", "request_query", "request_body", "response_body"} <= log.get_deferred_fields()
+        )
+
     def test_error_log_detail_view(self):
         self.client.force_login(self.staff)
         settings_obj = SiteConfiguration.get_solo()
@@ -1504,7 +1589,7 @@ class SiteAdminIndieAuthSettingsTests(TestCase):
 
     def _create_token(self, client_id, user, token_hash="a" * 64):
         return IndieAuthAccessToken.objects.create(
-            token_hash=token_hash,
+            token_hash=bytes.fromhex(token_hash),
             client_id=client_id,
             me="https://example.com",
             scope="read write",
@@ -1572,7 +1657,7 @@ class SiteAdminIndieAuthSettingsTests(TestCase):
             scope="read",
         )
         code = IndieAuthAuthorizationCode.objects.create(
-            code_hash="b" * 64,
+            code_hash=bytes.fromhex("b" * 64),
             code_challenge="challenge",
             code_challenge_method="S256",
             client_id=client.client_id,
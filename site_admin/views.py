@@ -1,8 +1,11 @@
+import heapq
 import json
 import logging
+import os
+import re
 import subprocess
 from urllib.parse import urlencode, urlparse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, timedelta
 from pathlib import Path
 from typing import Optional
@@ -60,8 +63,7 @@ from core.themes import (
     ingest_theme_archive,
     install_theme_from_git,
     update_theme_from_git,
-    list_theme_directories,
-    list_theme_files,
+    list_theme_entries,
     read_theme_file,
     clear_template_caches,
     resolve_theme_settings,
@@ -70,6 +72,7 @@ from core.themes import (
     theme_storage_healthcheck,
 )
 from micropub.models import MicropubRequestLog, Webmention
+from micropub.tasks import resend_single_webmention
 from indieauth.models import (
     IndieAuthAccessToken,
     IndieAuthAuthorizationCode,
@@ -80,7 +83,6 @@ from indieauth.models import (
 from blog.comments import AkismetError, submit_ham, submit_spam
 from micropub.webmention import (
     queue_webmentions_for_post,
-    resend_webmention,
     send_webmention,
 )
 
@@ -176,6 +178,8 @@ HCardEmailFormSet = inlineformset_factory(
 )
 
 ALLOWED_SUFFIXES = (".html", ".htm", ".txt", ".xml", ".md", ".css", ".js", ".json")
+_ALLOWED_SUFFIX_SET = frozenset(ALLOWED_SUFFIXES)
+_INVALID_THEME_ENTRY_NAME_RE = re.compile(r"^/|\\|\.\.")
 
 
 @dataclass
@@ -185,6 +189,42 @@ class ThemeFileSelection:
     content: str = ""
 
 
+@dataclass
+class _ThemeListingCache:
+    themes: Optional[list] = None
+    entries: dict = field(default_factory=dict)
+
+
+def _theme_listing_cache(request):
+    cache = getattr(request, "_theme_listing_cache", None)
+    if cache is None:
+        cache = _ThemeListingCache()
+        request._theme_listing_cache = cache
+    return cache
+
+
+def _cached_discover_themes(request):
+    cache = _theme_listing_cache(request)
+    if cache.themes is None:
+        cache.themes = discover_themes()
+    return cache.themes
+
+
+def _cached_theme_entries(request, slug):
+    cache = _theme_listing_cache(request)
+    if slug not in cache.entries:
+        cache.entries[slug] = list_theme_entries(slug, suffixes=ALLOWED_SUFFIXES)
+    return cache.entries[slug]
+
+
+def _cached_list_theme_files(request, slug):
+    return _cached_theme_entries(request, slug)[0]
+
+
+def _cached_list_theme_directories(request, slug):
+    return _cached_theme_entries(request, slug)[1]
+
+
 def _parse_positioned_ids(ids, positions):
     meta = {}
     for i in range(min(len(ids), len(positions))):
@@ -352,8 +392,17 @@ class SiteAdminLogoutView(LogoutView):
     next_page = "site_admin:login"
 
 
-def _theme_choices():
-    return [(theme.slug, theme.label) for theme in discover_themes()]
+def _merge_sorted_unique(*sorted_lists):
+    """Merge already-sorted lists into one sorted list without duplicates."""
+    merged = []
+    for item in heapq.merge(*sorted_lists):
+        if not merged or merged[-1] != item:
+            merged.append(item)
+    return merged
+
+
+def _theme_choices(request):
+    return [(theme.slug, theme.label) for theme in _cached_discover_themes(request)]
 
 
 def _is_git_path(path):
@@ -363,11 +412,11 @@ def _is_git_path(path):
 
 
 def _build_theme_selection(request, slug_param):
-    themes = discover_themes()
+    themes = _cached_discover_themes(request)
     default_slug = slug_param or request.GET.get("theme") or (themes[0].slug if themes else "")
     selected_slug = request.POST.get("theme", default_slug)
 
-    files = list_theme_files(selected_slug, suffixes=ALLOWED_SUFFIXES) if selected_slug else []
+    files = _cached_list_theme_files(request, selected_slug) if selected_slug else []
     files = [path for path in files if not _is_git_path(path)]
     default_path = request.GET.get("path") or (files[0] if files else None)
     if _is_git_path(default_path):
@@ -446,6 +495,9 @@ def _filter_webmentions_by_direction(webmentions, direction, request):
 def _redact_token_hash(token_hash):
     if not token_hash:
         return ""
+    if not isinstance(token_hash, str):
+        # Hashes are stored as raw SHA-256 bytes; show them as hex.
+        token_hash = bytes(token_hash).hex()
     prefix = token_hash[:6]
     suffix = token_hash[-4:] if len(token_hash) > 10 else token_hash[-2:]
     return f"{prefix}...{suffix}"
@@ -1664,6 +1716,8 @@ def error_log_list(request):
         return redirect("site_admin:site_settings")
 
     filter_form, logs = _filtered_error_logs(request)
+    # The list only shows summary columns; skip the header/body payloads.
+    logs = logs.only("id", "source", "method", "path", "status_code", "error", "created_at")
     paginator = Paginator(logs, 20)
     page_number = request.GET.get("page")
     try:
@@ -2234,15 +2288,12 @@ def webmention_resend(request, mention_id):
         messages.error(request, "Only webmentions sourced from this site can be resent.")
         return redirect("site_admin:webmention_detail", mention_id=mention.id)
 
-    resend_webmention(mention)
-    if mention.status == Webmention.ACCEPTED:
-        messages.success(request, "Webmention resent successfully.")
-    elif mention.status == Webmention.PENDING:
-        messages.warning(request, "Webmention is still pending after resend.")
-    elif mention.status == Webmention.TIMED_OUT:
-        messages.warning(request, "Webmention resend timed out.")
-    else:
-        messages.error(request, "Webmention resend was rejected.")
+    resend_single_webmention.delay(mention.id)
+    # The outcome (accepted, pending or rejected) lands on the mention's status
+    # once the worker finishes.
+    messages.success(
+        request, "Webmention resend queued. Refresh this page to see the updated status."
+    )
     return redirect("site_admin:webmention_detail", mention_id=mention.id)
 
 
@@ -3090,17 +3141,14 @@ def theme_settings(request):
                 upload_form.add_error("archive", f"Unexpected error: {exc}")
 
     install_map = {install.slug: install for install in ThemeInstall.objects.all()}
-    themes = discover_themes()
+    themes = _cached_discover_themes(request)
     theme_by_slug = {theme.slug: theme for theme in themes}
-    file_counts = {
-        theme.slug: len(list_theme_files(theme.slug, suffixes=ALLOWED_SUFFIXES))
-        for theme in themes
-    }
     all_slugs = sorted(set(theme_by_slug) | set(install_map))
 
     source_type = (request.GET.get("source_type") or "").strip()
     status = (request.GET.get("status") or "").strip()
     query = (request.GET.get("q") or "").strip()
+    query_lower = query.lower()
     status_choices = list(ThemeInstall.STATUS_CHOICES) + [
         ("missing_local", "Missing locally"),
         ("untracked", "Untracked"),
@@ -3108,10 +3156,16 @@ def theme_settings(request):
     valid_statuses = {value for value, _ in status_choices}
     valid_sources = dict(ThemeInstall.SOURCE_CHOICES)
 
-    inventory_rows = []
+    # Apply the filters before building rows, and only count files for the
+    # rows on the current page, so other themes never have their directories walked.
+    filtered_rows = []
     for slug in all_slugs:
         theme = theme_by_slug.get(slug)
         install = install_map.get(slug)
+        if source_type in valid_sources:
+            if not install or install.source_type != source_type:
+                continue
+
         local_present = theme is not None
         if install and not local_present:
             effective_status = "missing_local"
@@ -3126,53 +3180,52 @@ def theme_settings(request):
         else:
             effective_status = "untracked"
             install_status_label = "Untracked"
+        if status in valid_statuses and effective_status != status:
+            continue
 
-        row = {
-            "slug": slug,
-            "label": theme.label if theme else slug,
-            "theme": theme,
-            "install": install,
-            "file_count": file_counts.get(slug, 0) if local_present else 0,
-            "local_present": local_present,
-            "effective_status": effective_status,
-            "install_status_label": install_status_label,
-            "source_label": install.get_source_type_display() if install else "Local",
-            "source_ref": install.source_ref if install else "",
-            "source_url": install.safe_source_url() if install else "",
-            "version": (
-                theme.version
-                if theme and theme.version
-                else (install.version if install and install.version else "-")
-            ),
-            "author": theme.author if theme and theme.author else "-",
-            "last_synced_at": install.last_synced_at if install else None,
-            "is_active": slug == active_theme_slug,
-        }
-        inventory_rows.append(row)
-
-    filtered_rows = []
-    for row in inventory_rows:
-        if source_type in valid_sources:
-            if not row["install"] or row["install"].source_type != source_type:
-                continue
-        if status in valid_statuses:
-            if row["effective_status"] != status:
+        label = theme.label if theme else slug
+        source_ref = install.source_ref if install else ""
+        source_url = install.safe_source_url() if install else ""
+        if query_lower:
+            haystack = " ".join(filter(None, [slug, label, source_ref, source_url])).lower()
+            if query_lower not in haystack:
                 continue
-        if query:
-            haystack = " ".join(
-                filter(
-                    None,
-                    [
-                        row["slug"],
-                        row["label"],
-                        row.get("source_ref") or "",
-                        row.get("source_url") or "",
-                    ],
-                )
-            ).lower()
-            if query.lower() not in haystack:
-                continue
-        filtered_rows.append(row)
+
+        filtered_rows.append(
+            {
+                "slug": slug,
+                "label": label,
+                "theme": theme,
+                "install": install,
+                "file_count": 0,
+                "local_present": local_present,
+                "effective_status": effective_status,
+                "install_status_label": install_status_label,
+                "source_label": install.get_source_type_display() if install else "Local",
+                "source_ref": source_ref,
+                "source_url": source_url,
+                "version": (
+                    theme.version
+                    if theme and theme.version
+                    else (install.version if install and install.version else "-")
+                ),
+                "author": theme.author if theme and theme.author else "-",
+                "last_synced_at": install.last_synced_at if install else None,
+                "is_active": slug == active_theme_slug,
+            }
+        )
+
+    paginator = Paginator(filtered_rows, 50)
+    page_number = request.GET.get("page")
+    try:
+        page_obj = paginator.page(page_number)
+    except PageNotAnInteger:
+        page_obj = paginator.page(1)
+    except EmptyPage:
+        page_obj = paginator.page(paginator.num_pages)
+    for row in page_obj.object_list:
+        if row["local_present"]:
+            row["file_count"] = len(_cached_list_theme_files(request, row["slug"]))
     theme_settings_groups = []
     theme_settings_ungrouped_fields = []
     if theme_settings_form:
@@ -3216,7 +3269,10 @@ def theme_settings(request):
             "theme_settings_ungrouped_fields": theme_settings_ungrouped_fields,
             "active_theme": active_theme,
             "themes": themes,
-            "inventory_rows": filtered_rows,
+            "inventory_rows": page_obj.object_list,
+            "page_obj": page_obj,
+            "paginator": paginator,
+            "base_query": _strip_page_query(request),
             "active_theme_slug": active_theme_slug,
             "filters": {
                 "source_type": source_type,
@@ -3301,20 +3357,20 @@ def theme_file_edit(request, slug):
     if guard:
         return guard
 
-    themes = discover_themes()
+    themes = _cached_discover_themes(request)
     if not themes:
         messages.warning(request, "Upload a theme first to enable editing.")
         return redirect("site_admin:theme_settings")
 
-    theme_choices = _theme_choices()
+    theme_choices = _theme_choices(request)
     selection = _build_theme_selection(request, slug)
-    file_choices = (
-        list_theme_files(selection.slug, suffixes=ALLOWED_SUFFIXES) if selection.slug else []
-    )
+    file_choices = _cached_list_theme_files(request, selection.slug) if selection.slug else []
     file_choices = [path for path in file_choices if not _is_git_path(path)]
-    directory_choices = list_theme_directories(selection.slug) if selection.slug else []
+    directory_choices = (
+        _cached_list_theme_directories(request, selection.slug) if selection.slug else []
+    )
     directory_choices = [path for path in directory_choices if not _is_git_path(path)]
-    path_choices = sorted(set(file_choices + directory_choices))
+    path_choices = _merge_sorted_unique(file_choices, directory_choices)
 
     form_initial = {"theme": selection.slug, "path": selection.path, "content": selection.content}
     form = ThemeFileForm(theme_choices, path_choices, request.POST or None, initial=form_initial)
@@ -3333,7 +3389,7 @@ def theme_file_edit(request, slug):
             if not requested_name:
                 messages.error(request, "Provide a name for the new file.")
                 return redirect("site_admin:theme_file_edit", slug=chosen_theme)
-            if requested_name.startswith("/") or "\\" in requested_name or ".." in requested_name:
+            if _INVALID_THEME_ENTRY_NAME_RE.search(requested_name):
                 messages.error(
                     request, "Paths cannot start with '/' or contain backslashes or '..'."
                 )
@@ -3343,7 +3399,7 @@ def theme_file_edit(request, slug):
             target_relative = (target_dir / requested_name).as_posix()
 
             try:
-                if ALLOWED_SUFFIXES and Path(requested_name).suffix not in ALLOWED_SUFFIXES:
+                if _ALLOWED_SUFFIX_SET and os.path.splitext(requested_name)[1] not in _ALLOWED_SUFFIX_SET:
                     allowed = ", ".join(ALLOWED_SUFFIXES)
                     messages.error(
                         request, f"Files must use one of the allowed extensions: {allowed}"
@@ -78,7 +78,7 @@ class ProfileWidget(BaseWidget):
             if site_config.site_author_id:
                 hcard = (
                     HCard.objects.filter(user_id=site_config.site_author_id)
-                    .prefetch_related("photos")
+                    .prefetch_related(HCard.photos_prefetch())
                     .order_by("pk")
                     .first()
                 )
@@ -86,10 +86,9 @@ class ProfileWidget(BaseWidget):
             logger.exception("ProfileWidget: could not fetch hcard")
 
         note_html = None
-        if hcard and hcard.note:
-            md = markdown.Markdown(extensions=["fenced_code"])
+        if hcard and hcard.note_html:
             from django.utils.safestring import mark_safe
-            note_html = mark_safe(md.convert(hcard.note))
+            note_html = mark_safe(hcard.note_html)
 
         show_photo = config.get("show_photo", True)
         return render_to_string(